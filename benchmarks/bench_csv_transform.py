@@ -0,0 +1,109 @@
+"""
+CSV 轉 Notion 匯入資料的基準測試。
+
+產生指定筆數的合成資料並依行政區拆成多個 CSV，分別以原本逐列 iterrows 的寫法與
+向量化的 load_associations/clean_associations/iter_import_items 轉換，比較所需時間。
+
+    python benchmarks/bench_csv_transform.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import notion_functions  # noqa: E402
+
+DISTRICTS = [
+    "中區", "東區", "西區", "南區", "北區", "西屯區", "南屯區", "北屯區", "豐原區", "大里區",
+    "太平區", "東勢區", "大甲區", "清水區", "沙鹿區", "梧棲區", "后里區", "神岡區", "潭子區",
+    "大雅區", "新社區", "石岡區", "外埔區", "大安區", "烏日區", "大肚區", "龍井區", "霧峰區", "和平區"
+]
+
+
+def write_synthetic_csvs(directory, rows):
+    """
+    產生合成資料，依行政區寫入 directory，返回行政區與檔案路徑的對應。
+    """
+    rng = random.Random(0)
+    records = []
+    for i in range(rows):
+        district = rng.choice(DISTRICTS)
+        records.append({
+            'name': f'臺中市{district}第{i}社區發展協會',
+            'population': f'{rng.randint(100, 20000):,} 人' if rng.random() > 0.05 else None,
+            'address': f'臺中市{district}測試里{rng.randint(1, 30)}鄰測試路{i}號',
+            'email': f'user{i}@example.com' if rng.random() > 0.4 else None,
+            'contact_person': f'聯絡人{i}',
+            'title': rng.choice(['理事長', '總幹事', '常務監事']),
+            'phone': rng.choice([f'(04)2{i:07d}', f'04-2{i:07d}', f'09{i:08d}']),
+            'district': district,
+        })
+    df = pd.DataFrame(records)
+    file_paths = {}
+    for district, group in df.groupby('district'):
+        file_paths[district] = os.path.join(directory, f'{district}.csv')
+        group.to_csv(file_paths[district], index=False)
+    return file_paths
+
+
+def legacy_transform(file_paths, district_id_map):
+    """
+    原本 main() 中逐列轉換的寫法，作為比較基準。
+    """
+    data_list = []
+    for district, file_path in file_paths.items():
+        district_data = pd.read_csv(file_path)
+        for _, row in district_data.iterrows():
+            population_str = str(row['population'])
+            if population_str.lower() == 'nan':
+                cleaned_population = 0
+            else:
+                cleaned_population = int(population_str.replace(',', '').replace(' 人', ''))
+            data_example = {
+                '對接窗口': row['contact_person'],
+                '電話': row['phone'],
+                'Email': row['email'] if pd.notna(row['email']) else 'None',
+                '社區名稱': row['name'],
+                '職稱': row['title'],
+                '人口數量': cleaned_population,
+                '地址': row['address'],
+                '聯絡進度': '待聯絡',
+                '意願程度': 'None',
+                '聯絡方式': 'None'
+            }
+            data_list.append({'database_id': district_id_map[district], 'data': data_example})
+    return data_list
+
+
+def vectorized_transform(file_paths, district_id_map):
+    associations = notion_functions.clean_associations(notion_functions.load_associations(file_paths))
+    return list(notion_functions.iter_import_items(associations, district_id_map))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV 轉換基準測試')
+    parser.add_argument('--rows', type=int, default=100000, help='合成資料筆數')
+    parser.add_argument('--skip-legacy', action='store_true', help='不執行逐列轉換的比較基準')
+    args = parser.parse_args()
+
+    district_id_map = {district: f'database-{i}' for i, district in enumerate(DISTRICTS)}
+    with tempfile.TemporaryDirectory() as directory:
+        file_paths = write_synthetic_csvs(directory, args.rows)
+        transforms = [('向量化', vectorized_transform)]
+        if not args.skip_legacy:
+            transforms.insert(0, ('逐列 iterrows', legacy_transform))
+        for label, transform in transforms:
+            started = time.perf_counter()
+            items = transform(file_paths, district_id_map)
+            elapsed = time.perf_counter() - started
+            print(f'{label:14} {len(items)} 筆  {elapsed:.2f} 秒  {len(items) / elapsed:,.0f} 筆/秒')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+匯入與爬蟲的端對端吞吐量基準測試，全部針對本機的 Notion API 替身執行。
+
+匯入測試以 main() 相同的流程（load_associations -> clean_associations ->
+iter_import_items -> batch_add_info_to_notion_database）上傳資料；爬蟲測試以
+crawl() 爬取替身網站。結果包含每秒筆數、p50/p99 延遲及重試與 429 次數。
+
+    python benchmarks/bench_import.py --latency 0.05 --rate-429 0.02 --rate-5xx 0.01
+    python benchmarks/bench_import.py --crawl --list-pages 62 --rate-5xx 0.01
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'community_crawlers', 'taichung'))
+
+import notion_functions  # noqa: E402
+from mock_notion_server import CommunitySite, MockNotion, start_server  # noqa: E402
+
+DISTRICT_DIR = os.path.join(os.path.dirname(__file__), '..', 'community_crawlers', 'taichung', 'community')
+
+
+class LatencyRecorder:
+    """
+    以 NotionClient 的 hook 記錄每次請求的延遲、重試與 429 次數。
+    也可以設為爬蟲的 metrics，記錄爬蟲每次請求的延遲與重試；階段計時不記錄。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+
+    def __call__(self, method, path, status_code, elapsed, attempt):
+        with self.lock:
+            self.latencies.append(elapsed)
+            if attempt:
+                self.retries += 1
+            if status_code == 429:
+                self.rate_limited += 1
+            elif status_code is None or status_code >= 500:
+                self.server_errors += 1
+
+    def timer(self, stage):
+        return contextlib.nullcontext()
+
+    def report(self):
+        print(f'  延遲 p50 {percentile(self.latencies, 0.5) * 1000:.1f} ms，'
+              f'p99 {percentile(self.latencies, 0.99) * 1000:.1f} ms')
+        print(f'  重試 {self.retries} 次，429 {self.rate_limited} 次，5xx/連線錯誤 {self.server_errors} 次')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def bench_import(base_url, rows, concurrency, rate):
+    file_paths = {os.path.basename(path)[:-4]: path
+                  for path in sorted(glob.glob(os.path.join(DISTRICT_DIR, '*.csv')))}
+    district_id_map = {district: f'mock-{i}' for i, district in enumerate(file_paths)}
+    associations = notion_functions.clean_associations(notion_functions.load_associations(file_paths))
+    items = list(notion_functions.iter_import_items(associations, district_id_map))
+    # 需要更多資料時重複使用真實資料，並讓社區名稱保持唯一
+    while len(items) < rows:
+        for item in items[:rows - len(items)]:
+            data = dict(item['data'], 社區名稱=f"{item['data']['社區名稱']}#{len(items)}")
+            items.append({'database_id': item['database_id'], 'data': data})
+    items = items[:rows]
+
+    recorder = LatencyRecorder()
+    client = notion_functions.NotionClient('mock-token', base_url=base_url + '/v1',
+                                           hooks=[recorder], backoff=0.05,
+                                           pool_size=max(10, concurrency))
+    started = time.perf_counter()
+    result = notion_functions.batch_add_info_to_notion_database(
+        client, items, concurrency=concurrency, rate=rate)
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    print(f'匯入 {len(items)} 筆，成功 {len(result.created)} 筆，失敗 {len(result.errors)} 筆')
+    print(f'  {len(items) / elapsed:,.1f} 筆/秒，共 {elapsed:.2f} 秒')
+    recorder.report()
+
+
+def bench_crawl(base_url, list_pages, concurrency):
+    import taichung_community_info_crawler as crawler
+
+    crawler.BASE_URL = base_url + '/compoint/'
+    # 替身網站在本機，不需要禮貌性的限速
+    crawler.host_limiter = crawler.HostLimiter(max_per_second=10000)
+    urls = [crawler.list_page_url(i) for i in range(list_pages)]
+    recorder = LatencyRecorder()
+    crawler.metrics = recorder
+    started = time.perf_counter()
+    try:
+        table_data = crawler.crawl(urls, max_workers=concurrency)
+    finally:
+        crawler.metrics = None
+    elapsed = time.perf_counter() - started
+    records = sum(len(data) for data in table_data)
+    requests_made = len(urls) + records
+    print(f'爬取 {len(urls)} 個表格頁面、{records} 個詳細頁面，共 {elapsed:.2f} 秒')
+    print(f'  {requests_made / elapsed:,.1f} 頁/秒')
+    recorder.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='匯入與爬蟲的端對端基準測試')
+    parser.add_argument('--rows', type=int, default=620, help='匯入的筆數')
+    parser.add_argument('--concurrency', type=int, default=4, help='同時進行的請求數')
+    parser.add_argument('--rate', type=float, default=notion_functions.NOTION_RATE_LIMIT,
+                        help='每秒請求數上限；替身伺服器可調高以測量程式本身的吞吐量')
+    parser.add_argument('--latency', type=float, default=0.05, help='替身伺服器的基本延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.02, help='延遲的隨機變動秒數上限')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='回應 429 的機率')
+    parser.add_argument('--rate-5xx', type=float, default=0.0,
+                        help='回應 503 的機率，爬蟲基準測試時套用在替身網站上')
+    parser.add_argument('--crawl', action='store_true', help='執行爬蟲基準測試而非匯入')
+    parser.add_argument('--list-pages', type=int, default=62, help='替身網站的表格頁面數量')
+    args = parser.parse_args()
+
+    notion = MockNotion(args.latency, args.jitter, args.rate_429, args.rate_5xx, seed=0)
+    site = CommunitySite(list_pages=args.list_pages, rate_5xx=args.rate_5xx if args.crawl else 0.0, seed=0)
+    server, base_url = start_server(notion, site)
+    try:
+        if args.crawl:
+            bench_crawl(base_url, args.list_pages, args.concurrency)
+        else:
+            bench_import(base_url, args.rows, args.concurrency, args.rate)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+詳細頁面解析器的微基準測試。
+
+以爬蟲回應快取中的頁面，或 benchmarks/fixtures 中的 HTML，比較各解析器設定下
+parse_data 每頁所需的 CPU 時間。
+
+fixtures 中是合成的頁面，只有 parse_data 讀取的結構，沒有正式網站頁面的選單與指令碼，
+只能用來確認程式可以執行；比較解析器或部分解析的效果時，請先爬取一次再以 --cache 使用實際的頁面。
+
+    python benchmarks/bench_parse_data.py
+    python benchmarks/bench_parse_data.py --cache crawler_cache.sqlite
+    python benchmarks/bench_parse_data.py --workers 1 2 4
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'community_crawlers', 'taichung'))
+
+import taichung_community_info_crawler as crawler  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_pages(cache_path=None):
+    """
+    載入要解析的頁面；有指定快取時使用快取中的詳細頁面，否則使用 fixtures。
+    """
+    if cache_path:
+        connection = sqlite3.connect(cache_path)
+        rows = connection.execute(
+            "SELECT body FROM responses WHERE url NOT LIKE '%List.aspx%'").fetchall()
+        connection.close()
+        return [body for body, in rows]
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, encoding='utf-8') as file:
+            pages.append(file.read())
+    return pages
+
+
+def available_parsers():
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+def bench(pages, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        for html in pages:
+            crawler.parse_data(html)
+    return (time.process_time() - started) / (repeat * len(pages))
+
+
+def bench_workers(pages, repeat, workers):
+    """
+    以 parse_pages 的行程池解析，返回每頁的實際經過時間。
+    """
+    pages = pages * repeat
+    started = time.perf_counter()
+    crawler.parse_pages(pages, max_workers=workers)
+    return (time.perf_counter() - started) / len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='parse_data 微基準測試')
+    parser.add_argument('--cache', help='使用爬蟲回應快取中的頁面')
+    parser.add_argument('--repeat', type=int, default=200, help='每種設定重複解析的次數')
+    parser.add_argument('--workers', type=int, nargs='*', help='改為比較 parse_pages 在各行程數下的吞吐量')
+    args = parser.parse_args()
+
+    pages = load_pages(args.cache)
+    if not pages:
+        sys.exit('沒有可解析的頁面')
+    strainer = crawler.DETAIL_STRAINER
+    source = args.cache if args.cache else '合成頁面，數字不代表正式網站'
+    print(f'{len(pages)} 個頁面（{source}），每種設定重複 {args.repeat} 次')
+    if args.workers:
+        for workers in args.workers:
+            per_page = bench_workers(pages, args.repeat, workers)
+            print(f'{workers:3} 個行程: {per_page * 1000:.3f} ms/頁，{1 / per_page:,.0f} 頁/秒')
+        return
+    for html_parser in available_parsers():
+        for label, parse_only in (('完整解析', None), ('部分解析', strainer)):
+            crawler.HTML_PARSER = html_parser
+            crawler.DETAIL_STRAINER = parse_only
+            per_page = bench(pages, args.repeat)
+            print(f'{html_parser:12} {label}: {per_page * 1000:.3f} ms/頁')
+
+
+if __name__ == '__main__':
+    main()
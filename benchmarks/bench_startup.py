@@ -0,0 +1,61 @@
+"""
+命令列各指令的啟動時間基準測試。
+
+每個指令在全新的直譯器中載入 cli.py 與該指令需要的模組，取多次量測的中位數，
+與 cli.IMPORT_BUDGET_MS 中的預算比較；超出預算時以非零狀態結束，可放在 CI 中檢查。
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 crawl import
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import cli  # noqa: E402
+
+SNIPPET = '''
+import time
+started = time.perf_counter()
+import cli
+loaded = time.perf_counter()
+cli.load_command({command!r})
+finished = time.perf_counter()
+import sys
+print((loaded - started) * 1000, (finished - loaded) * 1000, 'pandas' in sys.modules)
+'''
+
+
+def measure(command):
+    output = subprocess.run([sys.executable, '-c', SNIPPET.format(command=command)], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout.split()
+    return float(output[0]), float(output[1]), output[2] == 'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令列啟動時間基準測試')
+    parser.add_argument('commands', nargs='*', default=list(cli.COMMAND_MODULES), help='要量測的指令')
+    parser.add_argument('--repeat', type=int, default=5, help='每個指令量測的次數')
+    args = parser.parse_args()
+
+    over_budget = []
+    for command in args.commands:
+        samples = [measure(command) for _ in range(args.repeat)]
+        cli_ms = statistics.median(sample[0] for sample in samples)
+        command_ms = statistics.median(sample[1] for sample in samples)
+        budget = cli.IMPORT_BUDGET_MS[command]
+        status = '超出預算' if command_ms > budget else 'OK'
+        pandas_loaded = '，已載入 pandas' if samples[0][2] else ''
+        print(f'{command:10} cli {cli_ms:6.1f} ms  指令 {command_ms:6.1f} ms / 預算 {budget} ms  {status}{pandas_loaded}')
+        if command_ms > budget:
+            over_budget.append(command)
+    if over_budget:
+        sys.exit(f'超出啟動時間預算：{", ".join(over_budget)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""
+本機的 Notion API 替身，供測試與基準測試使用，不會連到 api.notion.com。
+
+實作 /v1/pages、/v1/databases、/v1/search 與具分頁的 /v1/databases/{id}/query（支援
+last_edited_time 篩選），資料只存在記憶體中。
+可注入延遲、429 與 5xx 錯誤，模擬正式環境的限流與不穩定。
+另外在 /compoint/ 底下提供社區發展協會網站的替身，供爬蟲基準測試使用。
+
+    python benchmarks/mock_notion_server.py --port 8765 --latency 0.05 --rate-429 0.05
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# 各屬性型別的空值，用來補齊頁面中沒有提供的屬性
+EMPTY_VALUES = {
+    'title': [], 'rich_text': [], 'number': None, 'phone_number': None,
+    'email': None, 'select': None,
+}
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def to_rich_text(items):
+    return [{
+        'type': 'text',
+        'text': {'content': item['text']['content'], 'link': item['text'].get('link')},
+        'plain_text': item['text']['content'],
+    } for item in items]
+
+
+def to_property(value):
+    """
+    將請求中的屬性值轉成 Notion 回應中的格式，例如補上 type 與 plain_text。
+    """
+    value = dict(value)
+    value.pop('type', None)
+    property_type, content = next(iter(value.items()))
+    if property_type in ('title', 'rich_text'):
+        content = to_rich_text(content)
+    elif property_type == 'select' and content is not None:
+        content = {'id': content['name'], 'name': content['name'], 'color': 'default'}
+    return {'id': property_type, 'type': property_type, property_type: content}
+
+
+class MockNotion:
+    """
+    記憶體中的 Notion 資料與錯誤注入設定。
+    :param latency: 每個請求的基本延遲秒數。
+    :param jitter: 延遲的隨機變動秒數上限。
+    :param rate_429: 回應 429 的機率。
+    :param rate_5xx: 回應 503 的機率。
+    :param retry_after: 429 回應的 Retry-After 秒數。
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, rate_5xx=0.0, retry_after=0.1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.databases = {}
+        self.pages = {}
+        self.stats = {'requests': 0, '429': 0, '5xx': 0}
+
+    def inject_fault(self):
+        """
+        依設定的延遲與錯誤率決定是否回應錯誤，返回 (status, headers) 或 None。
+        """
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            self.stats['requests'] += 1
+            roll = self.random.random()
+            if roll < self.rate_429:
+                self.stats['429'] += 1
+                return 429, {'Retry-After': str(self.retry_after)}
+            if roll < self.rate_429 + self.rate_5xx:
+                self.stats['5xx'] += 1
+                return 503, {}
+        return None
+
+    def create_database(self, body):
+        database_id = str(uuid.uuid4())
+        database = {
+            'object': 'database',
+            'id': database_id,
+            'parent': body.get('parent'),
+            'title': to_rich_text(body.get('title', [])),
+            'properties': {name: {'id': name, 'name': name, 'type': next(iter(schema)), **schema}
+                           for name, schema in body.get('properties', {}).items()},
+            'created_time': now_iso(),
+            'last_edited_time': now_iso(),
+            'archived': False,
+        }
+        with self.lock:
+            self.databases[database_id] = database
+        return 200, database
+
+    def create_page(self, body):
+        database_id = body.get('parent', {}).get('database_id')
+        if not database_id:
+            return 400, error('validation_error', 'parent.database_id is required')
+        properties = {name: to_property(value) for name, value in body.get('properties', {}).items()}
+        with self.lock:
+            database = self.databases.get(database_id)
+            if database:
+                for name, schema in database['properties'].items():
+                    properties.setdefault(name, {'id': name, 'type': schema['type'],
+                                                 schema['type']: EMPTY_VALUES.get(schema['type'])})
+            page = {
+                'object': 'page',
+                'id': str(uuid.uuid4()),
+                'parent': {'type': 'database_id', 'database_id': database_id},
+                'created_time': now_iso(),
+                'last_edited_time': now_iso(),
+                'archived': False,
+                'properties': properties,
+            }
+            self.pages[page['id']] = page
+        return 200, page
+
+    def update_page(self, page_id, body):
+        with self.lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return 404, error('object_not_found', f'Could not find page with ID: {page_id}.')
+            for name, value in body.get('properties', {}).items():
+                page['properties'][name] = to_property(value)
+            if 'archived' in body:
+                page['archived'] = body['archived']
+            page['last_edited_time'] = now_iso()
+        return 200, page
+
+    def query_database(self, database_id, body):
+        page_size = min(int(body.get('page_size', 100)), 100)
+        start = int(body.get('start_cursor') or 0)
+        # 只支援 last_edited_time 的 on_or_after 篩選，ISO 時間字串可直接比較大小
+        edited_after = body.get('filter', {}).get('last_edited_time', {}).get('on_or_after', '')
+        with self.lock:
+            rows = [page for page in self.pages.values()
+                    if page['parent']['database_id'] == database_id and not page['archived']
+                    and page['last_edited_time'] >= edited_after]
+        results = rows[start:start + page_size]
+        has_more = start + page_size < len(rows)
+        return 200, {
+            'object': 'list',
+            'results': results,
+            'has_more': has_more,
+            'next_cursor': str(start + page_size) if has_more else None,
+        }
+
+
+    def search(self, body):
+        page_size = min(int(body.get('page_size', 100)), 100)
+        start = int(body.get('start_cursor') or 0)
+        object_type = body.get('filter', {}).get('value')
+        with self.lock:
+            objects = list(self.databases.values()) if object_type != 'page' else []
+            if object_type != 'database':
+                objects += list(self.pages.values())
+        results = objects[start:start + page_size]
+        has_more = start + page_size < len(objects)
+        return 200, {
+            'object': 'list',
+            'results': results,
+            'has_more': has_more,
+            'next_cursor': str(start + page_size) if has_more else None,
+        }
+
+
+def error(code, message):
+    return {'object': 'error', 'code': code, 'message': message}
+
+
+class CommunitySite:
+    """
+    社區發展協會網站的替身：List.aspx 列出詳細頁面的連結，Detail.aspx 使用 fixtures 中的頁面。
+    :param list_pages: 表格頁面數量。
+    :param rows_per_page: 每個表格頁面的連結數量。
+    :param rate_5xx: 回應 503 的機率，爬蟲只重試 5xx 與連線錯誤，因此不注入 429。
+    :param pager_window: 分頁列只列出前後這麼多頁、不列出最後一頁；None 表示與正式網站相同。
+    """
+
+    def __init__(self, list_pages=62, rows_per_page=10, rate_5xx=0.0, seed=None, pager_window=None):
+        self.list_pages = list_pages
+        self.rows_per_page = rows_per_page
+        self.pager_window = pager_window
+        self.rate_5xx = rate_5xx
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, '5xx': 0}
+        with open(os.path.join(FIXTURES, 'detail_page.html'), encoding='utf-8') as file:
+            self.detail_page = file.read()
+
+    def list_page(self, page_number):
+        rows = ''.join(
+            f'<tr><td><a href="Detail.aspx?id={page_number}-{i}">社區 {page_number}-{i}</a></td></tr>'
+            for i in range(self.rows_per_page))
+        if self.pager_window is None:
+            # 分頁列與正式網站一樣列出鄰近頁碼及最後一頁的連結
+            numbers = {0, page_number - 1, page_number + 1, self.list_pages - 1}
+        else:
+            numbers = set(range(page_number - self.pager_window, page_number + self.pager_window + 1))
+        numbers = sorted(numbers & set(range(self.list_pages)))
+        pager = ''.join(f'<a href="List.aspx?Parser=99,6,22,,,,,,,,{n},,,,,,1">{n + 1}</a>' for n in numbers)
+        return (f'<html><body><table><tr><th>社團名稱</th></tr>{rows}</table>'
+                f'<div class="pager">{pager}</div></body></html>')
+
+    def detail(self, detail_id):
+        return self.detail_page.replace('大誠社區', f'測試{detail_id}社區')
+
+    def inject_fault(self):
+        """
+        依設定的錯誤率決定是否回應 503。
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.random.random() < self.rate_5xx:
+                self.stats['5xx'] += 1
+                return True
+        return False
+
+
+def make_handler(notion, site):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # 標頭與內容分兩次寫出，關閉 Nagle 以免延遲確認拖慢每個請求
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        def dispatch(self, method):
+            body = self.read_body() if method != 'GET' else {}
+            path = self.path.split('?')[0].rstrip('/')
+            if path.startswith('/compoint/'):
+                return self.serve_site()
+
+            fault = notion.inject_fault()
+            if fault:
+                status, headers = fault
+                return self.send_json(status, error('rate_limited' if status == 429 else 'service_unavailable',
+                                                    'injected fault'), headers)
+
+            if method == 'POST' and path == '/v1/pages':
+                return self.send_json(*notion.create_page(body))
+            match = re.fullmatch(r'/v1/pages/([\w-]+)', path)
+            if method == 'PATCH' and match:
+                return self.send_json(*notion.update_page(match.group(1), body))
+            if method == 'POST' and path == '/v1/search':
+                return self.send_json(*notion.search(body))
+            if method == 'POST' and path == '/v1/databases':
+                return self.send_json(*notion.create_database(body))
+            match = re.fullmatch(r'/v1/databases/([\w-]+)/query', path)
+            if method == 'POST' and match:
+                return self.send_json(*notion.query_database(match.group(1), body))
+            match = re.fullmatch(r'/v1/databases/([\w-]+)', path)
+            if method == 'GET' and match and match.group(1) in notion.databases:
+                return self.send_json(200, notion.databases[match.group(1)])
+            return self.send_json(404, error('object_not_found', f'{method} {path} is not supported'))
+
+        def serve_site(self):
+            if site.inject_fault():
+                return self.send_json(503, error('service_unavailable', 'injected fault'))
+            if 'List.aspx' in self.path:
+                match = re.search(r'Parser=99,6,22,,,,,,,,(\d*),', self.path)
+                page_number = int(match.group(1) or 0) if match else 0
+                html = site.list_page(page_number) if page_number < site.list_pages else '<html></html>'
+            else:
+                html = site.detail(self.path.split('id=')[-1])
+            payload = html.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self.dispatch('GET')
+
+        def do_POST(self):
+            self.dispatch('POST')
+
+        def do_PATCH(self):
+            self.dispatch('PATCH')
+
+    return Handler
+
+
+def start_server(notion=None, site=None, host='127.0.0.1', port=0):
+    """
+    在背景執行緒啟動替身伺服器。
+    :return: (server, base_url)；Notion API 位於 base_url + '/v1'，網站位於 base_url + '/compoint/'。
+    """
+    notion = notion or MockNotion()
+    site = site or CommunitySite()
+    server = ThreadingHTTPServer((host, port), make_handler(notion, site))
+    server.daemon_threads = True
+    server.notion = notion
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本機 Notion API 替身')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的基本延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延遲的隨機變動秒數上限')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='回應 429 的機率')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='回應 503 的機率')
+    parser.add_argument('--pager-window', type=int, help='網站分頁列只列出前後這麼多頁，不列出最後一頁')
+    args = parser.parse_args()
+
+    notion = MockNotion(args.latency, args.jitter, args.rate_429, args.rate_5xx)
+    server, base_url = start_server(notion, CommunitySite(pager_window=args.pager_window), port=args.port)
+    print(f'Notion API: {base_url}/v1  網站: {base_url}/compoint/')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+社區發展協會資料的統一命令列入口。
+
+    python cli.py crawl [--pages N] [--parse-workers N] [--dry-run]
+    python cli.py split
+    python cli.py provision [--dry-run]
+    python cli.py import [--dry-run]
+    python cli.py sync [--dry-run]
+    python cli.py mirror [--report]
+    python cli.py --metrics run.prom import
+
+各指令只在執行時才載入需要的模組，cli.py 本身只用到標準函式庫，因此 --help 與參數錯誤
+幾乎立即返回。--dry-run 只建立並列出會送出的請求內容（JSON Lines），不連線到 Notion；
+sync --dry-run 需要讀取現有頁面才能比對，只發出讀取的請求；
+crawl --dry-run 只讀取既有的回應快取，以 JSON Lines 印出爬取結果，不寫入 CSV、進度或快取檔案。
+
+啟動時間預算（載入指令所需模組的時間，以 benchmarks/bench_startup.py 在全新的直譯器中量測）：
+
+    指令                 預算      主要成本
+    split                 50 ms   re（pandas 在讀取 CSV 時才載入）
+    provision/import/sync 250 ms  requests；import/sync 讀取 CSV 時另外載入 pandas（約 400 ms）
+    mirror               250 ms   requests、sqlite3，不載入 pandas
+    crawl                400 ms   requests、BeautifulSoup
+
+新增模組層級的 import 時，請確認 bench_startup.py 仍在預算內；只有部分功能用到的大型套件
+（例如 pandas）應在使用的函式中才載入。
+"""
+import argparse
+import importlib
+import os
+
+# metrics 只用到標準函式庫，可以直接載入
+import metrics as run_metrics
+
+# 各指令需要載入的模組
+COMMAND_MODULES = {
+    'crawl': 'community_crawlers.taichung.taichung_community_info_crawler',
+    'split': 'community_crawlers.taichung.split_community_associations',
+    'provision': 'notion_functions',
+    'import': 'notion_functions',
+    'sync': 'notion_functions',
+    'mirror': 'notion_mirror',
+}
+
+# 載入各指令模組的時間上限（毫秒），見上方說明
+IMPORT_BUDGET_MS = {
+    'crawl': 400,
+    'split': 50,
+    'provision': 250,
+    'import': 250,
+    'sync': 250,
+    'mirror': 250,
+}
+
+
+def load_command(command):
+    return importlib.import_module(COMMAND_MODULES[command])
+
+
+def load_env():
+    # dotenv 只有連線到 Notion 的指令需要
+    import dotenv
+
+    dotenv.load_dotenv()
+
+
+def run_crawl(args, metrics):
+    crawler = load_command('crawl')
+    crawler.metrics = metrics
+    crawler.main(cache_path=None if args.no_cache else args.cache, cache_ttl=args.cache_ttl,
+                 offline=args.offline, state_path=None if args.no_resume else args.state,
+                 pages=args.pages, parse_workers=args.parse_workers, dry_run=args.dry_run)
+
+
+def run_split(args, metrics):
+    load_command('split').split_community_associations(args.input, args.output_dir)
+
+
+def run_notion(args, metrics):
+    notion_functions = load_command(args.command)
+    load_env()
+    notion_functions.main(sync=args.command == 'sync', provision=args.command == 'provision',
+                          checkpoint_path=getattr(args, 'checkpoint', None), metrics=metrics,
+                          dry_run=args.dry_run)
+
+
+def run_mirror(args, metrics):
+    notion_mirror = load_command('mirror')
+    if not args.report:
+        load_env()
+        if metrics:
+            from notion_functions import get_client
+
+            get_client(os.getenv("INTERNAL_INTEGRATION_SECRET")).add_hook(metrics)
+        written = notion_mirror.mirror_notion_databases(os.getenv("INTERNAL_INTEGRATION_SECRET"),
+                                                        db_path=args.db, full=args.full)
+        print(f"已寫入 {written} 筆資料到 {args.db}")
+    for district, progress, willingness, count in notion_mirror.progress_report(args.db):
+        print(f"{district}\t{progress}\t{willingness}\t{count}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="臺中市社區發展協會資料的爬取與 Notion 匯入")
+    run_metrics.add_arguments(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    crawl = commands.add_parser("crawl", help="爬取社區發展協會資料並寫入 community_associations.csv")
+    crawl.add_argument("--cache", default="crawler_cache.sqlite", help="回應快取的 SQLite 檔案路徑")
+    crawl.add_argument("--no-cache", action="store_true", help="不使用回應快取")
+    crawl.add_argument("--cache-ttl", type=float, default=24 * 60 * 60, help="快取有效秒數")
+    crawl.add_argument("--offline", action="store_true", help="只使用快取內容重跑，不發出任何請求")
+    crawl.add_argument("--dry-run", action="store_true", help="只讀取既有的快取並以 JSON Lines 印出資料，不連線也不寫入任何檔案")
+    crawl.add_argument("--state", default="crawler_state.jsonl",
+                       help="記錄已完成頁面的檔案，中斷後重新執行會從這裡接續")
+    crawl.add_argument("--no-resume", action="store_true", help="不記錄進度，每次都重新爬取")
+    crawl.add_argument("--pages", type=int, help="表格頁面數量，預設由第一個表格頁面判斷")
+    crawl.add_argument("--parse-workers", type=int, default=0,
+                       help="以多個行程解析詳細頁面，0 表示在爬取的執行緒中解析")
+    crawl.set_defaults(handler=run_crawl)
+
+    split = commands.add_parser("split", help="依行政區拆分爬取結果")
+    split.add_argument("--input", default="community_associations.csv", help="爬蟲寫出的 CSV 檔案")
+    split.add_argument("--output-dir", default="community_crawlers/taichung/community",
+                       help="各區 CSV 檔案的輸出目錄")
+    split.set_defaults(handler=run_split)
+
+    provision = commands.add_parser("provision",
+                                    help="在 PAGE_ID 頁面下建立缺少的各區資料庫，並更新 notion_districts.json")
+    import_ = commands.add_parser("import", help="將各區 CSV 資料新增到 Notion")
+    import_.add_argument("--checkpoint", default="notion_import_checkpoint.jsonl",
+                         help="記錄已新增資料的檔案，中斷後重新執行會從這裡接續")
+    sync = commands.add_parser("sync", help="只新增、更新或封存有變動的資料")
+    for command in (provision, import_):
+        command.add_argument("--dry-run", action="store_true",
+                             help="只列出會送出的請求內容（JSON Lines），不連線到 Notion")
+    sync.add_argument("--dry-run", action="store_true",
+                      help="讀取現有頁面，只列出會送出的新增、更新與封存請求（JSON Lines），不修改 Notion")
+    for command in (provision, import_, sync):
+        command.set_defaults(handler=run_notion)
+
+    mirror = commands.add_parser("mirror", help="將各區 Notion 資料庫同步到本機 SQLite")
+    mirror.add_argument("--db", default="notion_mirror.sqlite", help="SQLite 檔案路徑")
+    mirror.add_argument("--full", action="store_true", help="清除本機資料並重新讀取所有頁面")
+    mirror.add_argument("--report", action="store_true", help="只從本機資料列出各區聯絡進度")
+    mirror.set_defaults(handler=run_mirror)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    collected = run_metrics.Metrics() if args.metrics else None
+    with run_metrics.profiled(args.profile, args.profiler):
+        args.handler(args, collected)
+    if collected:
+        collected.write(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
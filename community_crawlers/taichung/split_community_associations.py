@@ -0,0 +1,82 @@
+import argparse
+import os
+import re
+
+# List of all districts
+ALL_DISTRICTS = [
+    "中區", "東區", "西區", "南區", "北區", "西屯區", "南屯區", "北屯區", "豐原區", "大里區",
+    "太平區", "東勢區", "大甲區", "清水區", "沙鹿區", "梧棲區", "后里區", "神岡區", "潭子區",
+    "大雅區", "新社區", "石岡區", "外埔區", "大安區", "烏日區", "大肚區", "龍井區", "霧峰區", "和平區"
+]
+
+
+def district_pattern(districts=ALL_DISTRICTS, city='臺中市'):
+    """
+    Build a regex that captures the district right after the city prefix,
+    e.g. 臺中市<區>社區發展協會. Longer names are tried first so that 西屯區
+    is never cut short by 西區-style prefixes.
+    """
+    names = '|'.join(map(re.escape, sorted(districts, key=len, reverse=True)))
+    city_names = {city, city.replace('臺', '台')}
+    prefix = '|'.join(map(re.escape, city_names))
+    return re.compile(f'^(?:{prefix})?(?P<district>{names})')
+
+
+DISTRICT_PATTERN = district_pattern()
+
+
+# Function to extract district from name
+def extract_district(name, pattern=DISTRICT_PATTERN):
+    match = pattern.match(name)
+    return match.group('district') if match else None
+
+
+def add_district_column(df, pattern=DISTRICT_PATTERN):
+    """
+    Extract the district of every row with one vectorized regex over 'name'.
+    """
+    df = df.copy()
+    df['district'] = df['name'].astype('string').str.extract(pattern, expand=False)
+    return df
+
+
+def split_community_associations(input_path='community_associations.csv',
+                                 output_dir='community_crawlers/taichung/community',
+                                 districts=ALL_DISTRICTS, city='臺中市'):
+    """
+    Split the scraped associations into one CSV file per district.
+
+    :param input_path: The CSV written by the crawler.
+    :param output_dir: The directory the district files are written to.
+    :param districts: The district names of the city.
+    :param city: The city prefix the association names start with.
+    :return: A dict of district name to the written file path.
+    """
+    # Imported here so that importing ALL_DISTRICTS does not pay for pandas
+    import pandas as pd
+
+    community_associations_df = add_district_column(
+        pd.read_csv(input_path), district_pattern(districts, city))
+
+    unmatched = community_associations_df['district'].isna().sum()
+    if unmatched:
+        print(f'{unmatched} rows have no recognizable district and were skipped')
+
+    os.makedirs(output_dir, exist_ok=True)
+    file_paths = {}
+    # Save every district in a single groupby pass
+    for district, district_df in community_associations_df.groupby('district', sort=False):
+        district_file_path = os.path.join(output_dir, f'{district}.csv')
+        district_df.to_csv(district_file_path, index=False)
+        file_paths[district] = district_file_path
+    return file_paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Split community associations by district')
+    parser.add_argument('--input', default='community_associations.csv',
+                        help='the CSV written by the crawler')
+    parser.add_argument('--output-dir', default='community_crawlers/taichung/community',
+                        help='the directory the district files are written to')
+    args = parser.parse_args()
+    split_community_associations(args.input, args.output_dir)
@@ -1,26 +1,300 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import csv
+import itertools
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import quote, urlsplit
 
+BASE_URL = "https://community.society.taichung.gov.tw/compoint/"
 
-def scrape_all_data(table_url):
+# 有安裝 lxml 時使用較快的 lxml 解析器
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 詳細頁面只需要 dd/dt 配對，其餘元素在解析時直接略過
+DETAIL_STRAINER = SoupStrainer(["dd", "dt"])
+# 聯絡資訊所在的 ul#comm2 起始標籤
+CONTACT_BLOCK = re.compile(r"<ul[^>]*\bid=[\"']?comm2\b", re.IGNORECASE)
+# 表格頁面分頁列中的頁碼連結（見 list_page_url）與「共 N 頁」文字
+PAGE_LINK = re.compile(r"Parser=99,6,22,,,,,,,,(\d+),")
+TOTAL_PAGES = re.compile(r"共\s*(\d+)\s*頁")
+
+
+class HostLimiter:
     """
-    從表格頁面提取所有鏈接，並從每個鏈接頁面提取詳細信息。
+    限制對同一主機的請求頻率，避免併發爬取時對網站造成過大負擔。
+    :param max_per_second: 每個主機每秒最多的請求數。
     """
-    # 從表格中提取所有鏈接
-    response = requests.get(table_url)
-    response.encoding = 'utf-8'
-    soup = BeautifulSoup(response.text, 'html.parser')
+
+    def __init__(self, max_per_second=15):
+        self.interval = 1 / max_per_second
+        self.next_allowed = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed.get(host, now))
+            self.next_allowed[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResponseCache:
+    """
+    以 SQLite 儲存在磁碟上的 HTTP 回應快取，以 URL 為鍵。
+    期限內的回應直接使用，過期的回應以 ETag/Last-Modified 發出條件式請求驗證。
+    :param path: SQLite 檔案路徑。
+    :param ttl: 快取有效秒數，期限內不發出任何請求。
+    :param max_bytes: 快取內容的大小上限，超過時淘汰最久未使用的項目。
+    :param offline: 離線模式，只使用快取內容，不發出任何請求。
+    :param read_only: 以唯讀方式開啟既有的快取檔案，不更新存取時間，也不發出任何請求。
+    """
+
+    def __init__(self, path, ttl=24 * 60 * 60, max_bytes=200 * 1024 * 1024, offline=False, read_only=False):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline or read_only
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        if read_only:
+            self.connection = sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True,
+                                              check_same_thread=False)
+            # 不是快取檔案時在這裡就引發 sqlite3.DatabaseError
+            self.connection.execute("SELECT 1 FROM responses LIMIT 1").fetchall()
+            return
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL, accessed_at REAL, size INTEGER)")
+        self.connection.commit()
+
+    def get(self, url):
+        """
+        取得快取項目，找不到時返回 None。
+        :return: 包含 body、etag、last_modified 及 fresh（是否仍在期限內）的字典。
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if not self.read_only:
+                self.connection.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+                self.connection.commit()
+        body, etag, last_modified, fetched_at = row
+        return {"body": body, "etag": etag, "last_modified": last_modified,
+                "fresh": now - fetched_at < self.ttl}
+
+    def put(self, url, body, etag=None, last_modified=None):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, len(body.encode('utf-8'))))
+            self._evict()
+            self.connection.commit()
+
+    def touch(self, url):
+        """
+        伺服器回應 304 時，重新計算該項目的有效期限。
+        """
+        with self.lock:
+            self.connection.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.connection.commit()
+
+    def _evict(self):
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def close(self):
+        self.connection.close()
+
+
+class CrawlState:
+    """
+    記錄已完成的表格頁面與詳細頁面，讓中斷的爬取可以從上次停下的地方繼續。
+    以 JSON Lines 格式逐筆附加寫入，每完成一個頁面就寫入一行，程式中斷也不會遺失已完成的部分。
+    :param path: 狀態檔案路徑，檔案已存在時會先載入其中的紀錄。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.links = {}
+        self.records = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 中斷時寫到一半的最後一行
+                        continue
+                    if 'links' in entry:
+                        self.links[entry['url']] = entry['links']
+                    else:
+                        self.records[entry['url']] = entry['data']
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, entry):
+        with self.lock:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+
+    def add_links(self, url, links):
+        self.links[url] = links
+        self._write({'url': url, 'links': links})
+
+    def add_record(self, url, data):
+        self.records[url] = data
+        self._write({'url': url, 'data': data})
+
+    def close(self):
+        self.file.close()
+
+    def clear(self):
+        """
+        爬取全部完成後刪除狀態檔案，下次執行時重新爬取。
+        """
+        self.close()
+        os.remove(self.path)
+
+
+# 所有請求共用同一個連線池，避免每次請求都重新建立 TCP/TLS 連線
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+host_limiter = HostLimiter()
+# 由 main() 或呼叫端設定，None 表示不使用快取
+response_cache = None
+# 由呼叫端設定的計時統計（例如 metrics.Metrics），None 表示不記錄
+metrics = None
+# 解析詳細頁面的行程池，由 start_parse_pool() 設定，None 表示在爬取的執行緒中解析
+parse_pool = None
+
+
+def _stage(name):
+    return metrics.timer(name) if metrics else contextlib.nullcontext()
+
+
+def fetch(url, timeout=(5, 30), max_retries=3, backoff=0.5):
+    """
+    以共用的連線取得頁面內容，遇到連線錯誤、逾時或 5xx 回應時會退避重試。
+    設定 response_cache 時，期限內的頁面直接由快取返回，過期的頁面以條件式請求驗證。
+    :param url: 頁面網址。
+    :return: 頁面的 HTML 文字。
+    """
+    with _stage('fetch'):
+        return _fetch(url, timeout, max_retries, backoff)
+
+
+def _record_attempt(url, status_code, started, attempt):
+    if metrics:
+        metrics('GET', urlsplit(url).path, status_code, time.perf_counter() - started, attempt)
+
+
+def _fetch(url, timeout, max_retries, backoff):
+    cache = response_cache
+    entry = cache.get(url) if cache else None
+    if entry and (entry["fresh"] or cache.offline):
+        return entry["body"]
+    if cache and cache.offline:
+        raise LookupError(f"離線模式下快取中沒有 {url}")
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    for attempt in range(max_retries + 1):
+        host_limiter.wait(url)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            _record_attempt(url, response.status_code, started, attempt)
+            if response.status_code == 304 and entry:
+                cache.touch(url)
+                return entry["body"]
+            if response.status_code < 500:
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+                if cache:
+                    cache.put(url, response.text, response.headers.get("ETag"),
+                              response.headers.get("Last-Modified"))
+                return response.text
+        except (requests.ConnectionError, requests.Timeout):
+            _record_attempt(url, None, started, attempt)
+            if attempt == max_retries:
+                raise
+        else:
+            if attempt == max_retries:
+                response.raise_for_status()
+        time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def parse_links(html):
+    """
+    從表格頁面的 HTML 提取所有詳細頁面的鏈接。
+    """
+    with _stage('parse'):
+        return _parse_links(html)
+
+
+def _parse_links(html):
+    soup = BeautifulSoup(html, 'html.parser')
     table = soup.find('table')
+    if table is None:
+        # 超出範圍的頁面沒有表格
+        return []
     rows = table.find_all('tr')
 
     links = []
     for row in rows:
         link = row.find('a')
         if link and 'href' in link.attrs:
-            full_link = "https://community.society.taichung.gov.tw/compoint/" + \
-                link['href']
+            full_link = BASE_URL + link['href']
             links.append(full_link)
+    return links
+
+
+def scrape_all_data(table_url):
+    """
+    從表格頁面提取所有鏈接，並從每個鏈接頁面提取詳細信息。
+    """
+    links = parse_links(fetch(table_url))
 
     # 對每個鏈接提取詳細信息
     all_data = []
@@ -33,58 +307,239 @@ def scrape_all_data(table_url):
 def scrape_data(url):
     """
     從給定的 URL 提取社團相關的詳細信息。
+    設定 parse_pool 時解析交給行程池，不受 GIL 限制，爬取的執行緒只等待結果。
     """
-    response = requests.get(url)
-    response.encoding = 'utf-8'
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # 提取信息，如果找不到則返回 None
-    name_element = soup.find("dd", class_="tabulation_tt", string="社團名稱")
-    name = name_element.find_next_sibling(
-        "dt").text.strip() if name_element else None
-
-    population_element = soup.find(
-        "dd", class_="tabulation_tt", string="社區人口數")
-    population = population_element.find_next_sibling(
-        "dt").text.strip() if population_element else None
-
-    address_element = soup.find("dd", class_="tabulation_tt", string="聯絡地址")
-    address = address_element.find_next_sibling(
-        "dt").text.strip() if address_element else None
-
-    email_element = soup.find("dd", class_="tabulation_tt", string="電子信箱")
-    email = email_element.find_next_sibling(
-        "dt").text.strip() if email_element else None
-
-    contact_info = soup.find("ul", id="comm2")
-    if contact_info:
-        contact_person_element = contact_info.find("dd", string="聯絡窗口")
-        contact_person = contact_person_element.find_next_sibling(
-            "dt").text.strip() if contact_person_element else None
-
-        title_element = contact_info.find(
-            "dd", string=lambda text: "職" in text)
-        title = title_element.find_next_sibling(
-            "dt").text.strip() if title_element else None
-
-        phone_element = contact_info.find(
-            "dd", string=lambda text: "電" in text)
-        phone = phone_element.find_next_sibling(
-            "dt").text.strip() if phone_element else None
-    else:
-        contact_person = title = phone = None
+    html = fetch(url)
+    if parse_pool is None:
+        return parse_data(html)
+    with _stage('parse'):
+        return parse_pool.submit(parse_html_bytes, html.encode('utf-8')).result()
+
+
+def parse_html_bytes(body):
+    """
+    解析 UTF-8 編碼的詳細頁面，供行程池使用：傳入原始位元組，只傳回精簡的欄位字典。
+    """
+    return parse_data(body.decode('utf-8'))
+
+
+def _init_parse_worker():
+    # 解析行程不記錄計時，也不使用快取或連線
+    global metrics, response_cache
+    metrics = None
+    response_cache = None
+
+
+def _new_parse_pool(max_workers):
+    # ProcessPoolExecutor 在第一次 submit 時才建立行程，那時爬取的執行緒可能正持有
+    # session、HostLimiter、快取或 metrics 的鎖；以 spawn 啟動全新的直譯器，不複製這些鎖
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_parse_worker)
+
+
+def start_parse_pool(max_workers=None):
+    """
+    建立解析詳細頁面的行程池，之後的 scrape_data 都會使用，用完後以 stop_parse_pool() 關閉。
+    :param max_workers: 行程數，None 表示 CPU 核心數。
+    """
+    global parse_pool
+    parse_pool = _new_parse_pool(max_workers)
+    return parse_pool
+
+
+def stop_parse_pool():
+    global parse_pool
+    if parse_pool is not None:
+        parse_pool.shutdown()
+        parse_pool = None
+
+
+def parse_pages(pages, max_workers=None, chunksize=16):
+    """
+    以多個行程解析大量詳細頁面，例如重新解析回應快取中的所有頁面。
+    :param pages: 詳細頁面 HTML 的列表。
+    :param max_workers: 行程數，None 表示 CPU 核心數，1 表示在目前的行程中解析。
+    :param chunksize: 每次交給一個行程的頁面數，減少行程間傳輸的次數。
+    :return: 解析結果的列表，順序與 pages 相同。
+    """
+    if max_workers == 1:
+        return [parse_data(html) for html in pages]
+    with _new_parse_pool(max_workers) as executor:
+        return list(executor.map(parse_html_bytes, (html.encode('utf-8') for html in pages),
+                                 chunksize=chunksize))
+
+
+def _pair_fields(html, class_=None):
+    """
+    只解析 dd/dt 元素，依文件順序建立「欄位名稱 -> 內容」的對應表。
+    同名欄位只保留第一個，與 soup.find 的行為一致。
+    :param class_: 只收錄帶有此 class 的 dd，None 表示全部收錄。
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=DETAIL_STRAINER)
+    fields = {}
+    for dd in soup.find_all("dd"):
+        if class_ and class_ not in dd.get("class", ()):
+            continue
+        dt = dd.find_next_sibling(["dd", "dt"])
+        if dt is not None and dt.name == "dt":
+            fields.setdefault(dd.get_text(strip=True), dt.get_text().strip())
+    return fields
+
+
+def parse_data(html):
+    """
+    從詳細頁面的 HTML 提取社團相關的詳細信息。
+    整頁只走訪一次 dd/dt 配對，聯絡資訊則只解析 ul#comm2 區塊。
+    """
+    with _stage('parse'):
+        return _parse_data(html)
+
+
+def _parse_data(html):
+    fields = _pair_fields(html, class_="tabulation_tt")
+
+    contacts = {}
+    match = CONTACT_BLOCK.search(html)
+    if match:
+        block_end = html.find("</ul>", match.start())
+        contacts = _pair_fields(html[match.start():block_end if block_end != -1 else None])
+
+    def find_contact(keyword):
+        # 聯絡資訊的欄位名稱可能含全形空白，例如「職　稱」，因此以關鍵字比對
+        return next((value for label, value in contacts.items() if keyword in label), None)
 
     return {
-        "name": name,
-        "population": population,
-        "address": address,
-        "email": email,
-        "contact_person": contact_person,
-        "title": title,
-        "phone": phone
+        "name": fields.get("社團名稱"),
+        "population": fields.get("社區人口數"),
+        "address": fields.get("聯絡地址"),
+        "email": fields.get("電子信箱"),
+        "contact_person": contacts.get("聯絡窗口"),
+        "title": find_contact("職"),
+        "phone": find_contact("電")
     }
 
 
+def list_page_url(page_number, base_url=None):
+    """
+    產生表格頁面的 URL，第一頁的 URL 與其他頁面有些不同。
+    :param base_url: 網站的 compoint 目錄，預設為 BASE_URL。
+    """
+    districts = '400-401-403-402-404-407-408-406-420-412-411-423-437-436-433-435-421-429-427-428-426-422-438-439-414-432-434-413-424'
+    url = (base_url or BASE_URL) + 'List.aspx?Parser=99,6,22,'
+    if page_number == 0:
+        return url + ',,,,,,,,,,,,' + districts + ',1'
+    return url + ',,,,,,,' + str(page_number) + ',,,,,' + districts + ',1'
+
+
+def parse_page_count(html):
+    """
+    從表格頁面的分頁列判斷總頁數，找不到分頁資訊時返回 None。
+    """
+    counts = [int(number) + 1 for number in PAGE_LINK.findall(html)]
+    counts += [int(number) for number in TOTAL_PAGES.findall(html)]
+    return max(counts) if counts else None
+
+
+def discover_page_count(max_pages=500):
+    """
+    由第一個表格頁面判斷表格頁面的數量，取代固定的頁數。
+    分頁列可能只列出鄰近的頁碼，因此從分頁列判斷的頁數之後仍逐頁往後探測，
+    直到出現沒有資料的頁面；沒有分頁資訊時從第二頁開始探測。
+    :param max_pages: 探測的頁數上限。
+    """
+    html = fetch(list_page_url(0))
+    if not parse_links(html):
+        return 0
+    count = min(parse_page_count(html) or 1, max_pages)
+    while count < max_pages:
+        html = fetch(list_page_url(count))
+        if not parse_links(html):
+            break
+        # 探測到的頁面也有分頁列，可以一次跳到它列出的最後一頁之後
+        count = max(count + 1, min(parse_page_count(html) or 0, max_pages))
+    return count
+
+
+def _crawl_links(url, state=None):
+    if state and url in state.links:
+        return state.links[url]
+    links = parse_links(fetch(url))
+    if state:
+        state.add_links(url, links)
+    return links
+
+
+def _crawl_record(url, state=None):
+    if state and url in state.records:
+        return state.records[url]
+    data = scrape_data(url)
+    if state:
+        state.add_record(url, data)
+    return data
+
+
+def crawl(table_urls, max_workers=8, state=None):
+    """
+    併發爬取多個表格頁面及其所有詳細頁面。
+    同時排入的表格頁面不超過 max_workers 個，每個表格頁面一解析完，其詳細頁面就排入
+    同一個工作池，下一個表格頁面排在這些詳細頁面之後，表格頁面與詳細頁面因此交錯進行。
+    :param table_urls: 表格頁面的 URL 列表。
+    :param max_workers: 同時進行的請求數上限。
+    :param state: CrawlState，已記錄的頁面不再重新取得，None 表示不記錄。
+    :return: 每個表格頁面的資料列表，順序與 table_urls 相同。
+    """
+    pending = iter(enumerate(table_urls))
+    detail_futures = [None] * len(table_urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list_futures = {}
+
+        def submit_list_page():
+            for i, url in itertools.islice(pending, 1):
+                list_futures[executor.submit(_crawl_links, url, state)] = i
+
+        for _ in range(max_workers):
+            submit_list_page()
+        while list_futures:
+            done, _ = wait(list_futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                detail_futures[list_futures.pop(future)] = [
+                    executor.submit(_crawl_record, link, state) for link in future.result()]
+                submit_list_page()
+        return [[future.result() for future in futures] for futures in detail_futures]
+
+
+def iter_crawl(table_urls, max_workers=8, max_pending=None, state=None):
+    """
+    併發爬取多個表格頁面及其詳細頁面，每完成一個詳細頁面就立即產生該筆資料。
+    同時進行中的詳細頁面不超過 max_pending 個，使用端處理得慢時爬蟲會跟著暫停，
+    記憶體用量不會隨資料量成長。表格頁面同樣只在待爬的連結不足時才取得，
+    同時進行的表格頁面不超過 max_workers 個，不會讓詳細頁面排在所有表格頁面之後。資料的順序不固定。
+    :param table_urls: 表格頁面的 URL 列表。
+    :param max_workers: 同時進行的請求數上限。
+    :param max_pending: 已排入但尚未取走的詳細頁面數上限，預設為 max_workers 的兩倍。
+    :param state: CrawlState，已記錄的頁面不再重新取得，None 表示不記錄。
+    """
+    max_pending = max_pending or max_workers * 2
+    pending = deque(table_urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list_futures = set()
+        links = deque()
+        detail_futures = set()
+        while pending or list_futures or links or detail_futures:
+            while pending and len(list_futures) < max_workers and len(links) < max_pending:
+                list_futures.add(executor.submit(_crawl_links, pending.popleft(), state))
+            while links and len(detail_futures) < max_pending:
+                detail_futures.add(executor.submit(_crawl_record, links.popleft(), state))
+            done, _ = wait(list_futures | detail_futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in list_futures:
+                    list_futures.remove(future)
+                    links.extend(future.result())
+                else:
+                    detail_futures.remove(future)
+                    yield future.result()
+
+
 def write_to_csv(data_list):
     """
     將數據列表寫入 CSV 文件。
@@ -104,30 +559,84 @@ def write_to_csv(data_list):
     print(f'數據已寫入 {filename}')
 
 
-def main():
+def main(cache_path='crawler_cache.sqlite', cache_ttl=24 * 60 * 60, offline=False,
+         state_path='crawler_state.jsonl', pages=None, parse_workers=0, dry_run=False):
     """
     主控制函數，生成多個 URL，提取數據，然後寫入 CSV 文件。
+    :param cache_path: 回應快取的 SQLite 檔案路徑，None 表示不使用快取。
+    :param cache_ttl: 快取有效秒數。
+    :param offline: 只使用快取內容重跑，不發出任何請求。
+    :param state_path: 記錄已完成頁面的檔案，中斷後重新執行會從這裡接續，None 表示不記錄。
+    :param pages: 表格頁面數量，None 表示由第一個表格頁面判斷。
+    :param parse_workers: 解析詳細頁面的行程數，0 表示在爬取的執行緒中解析。
+    :param dry_run: 只以唯讀方式讀取快取，將資料以 JSON Lines 印出，不發出請求也不寫入任何檔案。
     """
-    base_url = 'https://community.society.taichung.gov.tw/compoint/List.aspx?Parser=99,6,22,'
-    urls = []
-    table_data = []
+    global response_cache
+    # dry run 時標準輸出只有資料，其他訊息印到標準錯誤
+    log = sys.stderr if dry_run else None
+    if dry_run:
+        if not cache_path:
+            sys.exit('dry run 只使用既有的快取，不能與 --no-cache 一起使用')
+        if not os.path.exists(cache_path):
+            sys.exit(f'dry run 只使用既有的快取，找不到快取檔案 {cache_path}')
+        try:
+            response_cache = ResponseCache(cache_path, ttl=cache_ttl, read_only=True)
+        except sqlite3.DatabaseError as e:
+            sys.exit(f'無法讀取快取檔案 {cache_path}：{e}')
+        state_path = None
+    elif cache_path:
+        response_cache = ResponseCache(cache_path, ttl=cache_ttl, offline=offline)
+    if parse_workers:
+        start_parse_pool(parse_workers)
+    state = CrawlState(state_path) if state_path else None
+    if state and state.links:
+        print(f'從 {state_path} 接續：已完成 {len(state.links)} 個表格頁面、{len(state.records)} 個詳細頁面')
     count = 0
-    for i in range(0, 62):
-        if i == 0:  # 第一頁的 URL 有些不同
-            url = base_url + ',,,,,,,,,,,,400-401-403-402-404-407-408-406-420-412-411-423-437-436-433-435-421-429-427-428-426-422-438-439-414-432-434-413-424,1'
-        else:
-            url = base_url + ',,,,,,,' + \
-                str(i) + ',,,,,400-401-403-402-404-407-408-406-420-412-411-423-437-436-433-435-421-429-427-428-426-422-438-439-414-432-434-413-424,1'
-        urls.append(url)
-    for url in urls:
-        datas = scrape_all_data(url)
-        table_data.append(datas)
+    try:
+        if pages is None:
+            pages = discover_page_count()
+        print(f'共 {pages} 個表格頁面', file=log)
+        urls = [list_page_url(i) for i in range(pages)]
+        table_data = crawl(urls, state=state)
+    except LookupError as e:
+        if not response_cache or not response_cache.offline:
+            raise
+        sys.exit(f'{e}，請先在連線時爬取一次以建立快取')
+    finally:
+        stop_parse_pool()
     for data in table_data:
         count = count + len(data)
-    print(count)
     merged_data_list = [item for sublist in table_data for item in sublist]
+    if dry_run:
+        for data in merged_data_list:
+            print(json.dumps(data, ensure_ascii=False))
+        print(f'dry run：共 {count} 筆資料，未寫入任何檔案', file=sys.stderr)
+        return
+    print(count)
     write_to_csv(merged_data_list)
+    if state:
+        state.clear()
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='爬取臺中市社區發展協會資料')
+    parser.add_argument('--cache', default='crawler_cache.sqlite',
+                        help='回應快取的 SQLite 檔案路徑')
+    parser.add_argument('--no-cache', action='store_true', help='不使用回應快取')
+    parser.add_argument('--cache-ttl', type=float, default=24 * 60 * 60,
+                        help='快取有效秒數')
+    parser.add_argument('--offline', action='store_true',
+                        help='只使用快取內容重跑，不發出任何請求')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只讀取既有的快取並以 JSON Lines 印出資料，不連線也不寫入任何檔案')
+    parser.add_argument('--state', default='crawler_state.jsonl',
+                        help='記錄已完成頁面的檔案，中斷後重新執行會從這裡接續')
+    parser.add_argument('--no-resume', action='store_true', help='不記錄進度，每次都重新爬取')
+    parser.add_argument('--pages', type=int, help='表格頁面數量，預設由第一個表格頁面判斷')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='以多個行程解析詳細頁面，0 表示在爬取的執行緒中解析')
+    args = parser.parse_args()
+    main(cache_path=None if args.no_cache else args.cache,
+         cache_ttl=args.cache_ttl, offline=args.offline,
+         state_path=None if args.no_resume else args.state, pages=args.pages,
+         parse_workers=args.parse_workers, dry_run=args.dry_run)
@@ -0,0 +1,209 @@
+import argparse
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from community_crawlers.taichung.split_community_associations import DISTRICT_PATTERN, extract_district
+
+# 社區名稱中共同的前後綴，比對相似度前先去掉，避免「福安」與「福和」因為共同的部分被判定為相似
+NAME_SUFFIX = re.compile(r'(社區)?(發展)?協會$')
+CITY_PREFIX = re.compile(r'^(\d{3,6})?(臺中市)?')
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def _normalize_text(value):
+    if value is None or value != value:  # None 或 NaN
+        return ''
+    value = unicodedata.normalize('NFKC', str(value)).replace('台', '臺')
+    return NON_WORD.sub('', value)
+
+
+def normalize_name(name):
+    """
+    Returns the distinctive part of an association name, e.g. 福安 for
+    "臺中市西屯區 福安社區發展協會".
+    """
+    name = _normalize_text(name)
+    match = DISTRICT_PATTERN.match(name)
+    if match:
+        name = name[match.end():]
+    return NAME_SUFFIX.sub('', name) or name
+
+
+def normalize_phone(phone):
+    """
+    Keeps only the digits, so "(04)2345-6789" and "04-23456789" are equal.
+    """
+    return re.sub(r'\D', '', str(phone)) if phone is not None and phone == phone else ''
+
+
+def normalize_address(address):
+    """
+    Drops whitespace, punctuation, the postal code and the city prefix.
+    """
+    return CITY_PREFIX.sub('', _normalize_text(address))
+
+
+def name_grams(name):
+    """
+    Returns the character bigrams of a normalized name.
+    """
+    return {name[i:i + 2] for i in range(len(name) - 1)} or {name}
+
+
+def is_similar(a, b, threshold):
+    """
+    Whether the SequenceMatcher ratio of two strings reaches threshold. The
+    cheap upper bounds are checked first, so most dissimilar pairs never reach
+    the full comparison.
+    """
+    if a == b:
+        return True
+    if not a or not b:
+        return False
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+
+class AssociationIndex:
+    """
+    Finds scraped associations that were already seen.
+
+    Records are first looked up in a hash index on the normalized
+    (name, phone, address). Records that differ slightly are found by
+    blocking: only records of the same district are compared, and within a
+    district a record with a phone is only compared with records with the same
+    phone or without a phone. Records without a phone are found through an
+    inverted index of name bigrams, which only skips records that share too
+    few bigrams to reach the threshold; very short names are compared with
+    every record of the district.
+
+    A record is a duplicate when its name is at least threshold similar and
+    the phones match, or, when either phone is missing, the address is at
+    least threshold similar.
+
+    :param threshold: The minimum similarity ratio of two names or addresses.
+    """
+
+    def __init__(self, threshold=0.9):
+        self.threshold = threshold
+        self.keys = {}
+        self.records = []
+        # 行政區 -> 電話 -> 紀錄位置
+        self.phones = defaultdict(lambda: defaultdict(list))
+        # 行政區 -> 名稱 bigram -> 紀錄位置，分為所有紀錄與沒有電話的紀錄兩份
+        self.grams = defaultdict(lambda: defaultdict(list))
+        self.phoneless_grams = defaultdict(lambda: defaultdict(list))
+        # 行政區 -> 紀錄位置，bigram 無法排除任何紀錄時逐筆比對
+        self.members = defaultdict(list)
+        self.phoneless_members = defaultdict(list)
+
+    def _gram_candidates(self, index, members, name):
+        grams = name_grams(name)
+        # ratio = 2M / (len(a) + len(b)) >= t 且 M <= len(a)，所以 len(a) + len(b) <= 2 * len(a) / t，
+        # 兩邊未配對的字元最多 (1 - t) * 2 * len(a) / t 個。每個未配對的字元最多讓 a 失去兩個 bigram，
+        # 因此相似的名稱至少共有 len(grams) - lost 個 bigram，只要查最少見的 lost + 1 個就不會漏掉
+        edits = (1 - self.threshold) * 2 * len(name) / self.threshold
+        lost = int(2 * edits + 1e-9)
+        if len(name) < 2 or lost >= len(grams):
+            return set(members)
+        probes = sorted(grams, key=lambda gram: len(index.get(gram, ())))[:lost + 1]
+        return {position for gram in probes for position in index.get(gram, ())}
+
+    def _is_match(self, name, phone, address, other):
+        other_name, other_phone, other_address = other
+        if not is_similar(name, other_name, self.threshold):
+            return False
+        if phone and other_phone:
+            return phone == other_phone
+        return is_similar(address, other_address, self.threshold)
+
+    def add(self, record, district=None):
+        """
+        Indexes a record unless it duplicates an indexed one.
+
+        :param record: A dict with name, phone and address, as scraped.
+        :param district: The block of the record, extracted from the name by default.
+        :return: The position of the matching earlier record, or None when the record is new.
+        """
+        name = normalize_name(record.get('name'))
+        phone = normalize_phone(record.get('phone'))
+        address = normalize_address(record.get('address'))
+        key = (name, phone, address)
+        if key in self.keys:
+            return self.keys[key]
+
+        if district is None:
+            district = record.get('district')
+            if not isinstance(district, str):
+                district = extract_district(_normalize_text(record.get('name')))
+        if phone:
+            candidates = set(self.phones[district].get(phone, ()))
+            candidates |= self._gram_candidates(self.phoneless_grams[district],
+                                                self.phoneless_members[district], name)
+        else:
+            candidates = self._gram_candidates(self.grams[district], self.members[district], name)
+        for position in sorted(candidates):
+            if self._is_match(name, phone, address, self.records[position]):
+                self.keys[key] = position
+                return position
+
+        position = len(self.records)
+        self.records.append(key)
+        self.keys[key] = position
+        self.members[district].append(position)
+        if phone:
+            self.phones[district][phone].append(position)
+        else:
+            self.phoneless_members[district].append(position)
+        for gram in name_grams(name):
+            self.grams[district][gram].append(position)
+            if not phone:
+                self.phoneless_grams[district][gram].append(position)
+        return None
+
+
+def iter_unique_associations(records, threshold=0.9, duplicates=None):
+    """
+    Drops duplicate associations from a stream of records, keeping the first one.
+
+    :param records: An iterable of scraped record dicts.
+    :param threshold: See AssociationIndex.
+    :param duplicates: Optional list the dropped records are appended to.
+    """
+    index = AssociationIndex(threshold)
+    for record in records:
+        if index.add(record) is None:
+            yield record
+        elif duplicates is not None:
+            duplicates.append(record)
+
+
+def drop_duplicate_associations(df, threshold=0.9):
+    """
+    Drops duplicate associations from a DataFrame, keeping the first row of each.
+
+    :param df: Rows with name, phone and address columns, and optionally district.
+    :param threshold: See AssociationIndex.
+    :return: A copy of df without the duplicate rows.
+    """
+    index = AssociationIndex(threshold)
+    keep = [index.add(record) is None for record in df.to_dict('records')]
+    return df[keep].reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='移除爬取結果中重複的社區發展協會')
+    parser.add_argument('--input', default='community_associations.csv', help='爬蟲寫出的 CSV 檔案')
+    parser.add_argument('--output', help='輸出的 CSV 檔案，預設覆寫輸入檔案')
+    parser.add_argument('--threshold', type=float, default=0.9, help='名稱與地址的相似度門檻')
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    associations = pd.read_csv(args.input, dtype=str)
+    unique = drop_duplicate_associations(associations, args.threshold)
+    unique.to_csv(args.output or args.input, index=False)
+    print(f'移除 {len(associations) - len(unique)} 筆重複資料，保留 {len(unique)} 筆')
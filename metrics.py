@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+# HTTP 延遲直方圖的上界（秒），與 Prometheus 的 histogram 相同為累計計數
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+# Notion 的頁面與資料庫 ID，統計時以 {id} 取代，讓同一個端點歸在一起
+ID_SEGMENT = re.compile(r'/[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}(?=/|$)')
+
+
+def endpoint_name(method, path):
+    """
+    Returns the label a request is counted under, e.g. 'PATCH /pages/{id}'.
+    """
+    return f"{method} {ID_SEGMENT.sub('/{id}', path.split('?')[0])}"
+
+
+class Metrics:
+    """
+    Collects the timings of a crawl or import run.
+
+    Stage timers add up the time of every unit of work of a stage (a fetched
+    page, a parsed page, a transformed chunk, an upload); work done by several
+    threads at once is added up, so the stage totals can exceed the run time.
+
+    An instance is also a NotionClient hook: registered with client.add_hook,
+    it records a latency histogram, the status codes, the retries and the 429
+    responses of every endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.endpoints = {}
+
+    def add_time(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """
+        Times the enclosed block as one unit of work of a stage.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - started)
+
+    def __call__(self, method, path, status_code, elapsed, attempt):
+        endpoint = endpoint_name(method, path)
+        status = 'error' if status_code is None else str(status_code)
+        with self.lock:
+            entry = self.endpoints.get(endpoint)
+            if entry is None:
+                entry = self.endpoints[endpoint] = {
+                    "count": 0, "seconds": 0.0, "max_seconds": 0.0, "retries": 0,
+                    "rate_limited": 0, "status": {}, "buckets": [0] * len(LATENCY_BUCKETS),
+                }
+            entry["count"] += 1
+            entry["seconds"] += elapsed
+            entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+            entry["status"][status] = entry["status"].get(status, 0) + 1
+            if attempt:
+                entry["retries"] += 1
+            if status_code == 429:
+                entry["rate_limited"] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    entry["buckets"][i] += 1
+
+    def summary(self):
+        """
+        Returns the collected metrics as a JSON-serializable dict.
+        """
+        with self.lock:
+            endpoints = {}
+            for endpoint, entry in self.endpoints.items():
+                endpoints[endpoint] = dict(
+                    entry, status=dict(entry["status"]),
+                    buckets={('+Inf' if bound == float('inf') else str(bound)): count
+                             for bound, count in zip(LATENCY_BUCKETS, entry["buckets"])})
+            return {
+                "elapsed_seconds": time.perf_counter() - self.started,
+                "stages": {stage: dict(entry) for stage, entry in self.stages.items()},
+                "http": endpoints,
+                "retries": sum(entry["retries"] for entry in endpoints.values()),
+                "rate_limited": sum(entry["rate_limited"] for entry in endpoints.values()),
+            }
+
+    def prometheus(self, prefix='notion_import'):
+        """
+        Returns the collected metrics in the Prometheus text exposition format.
+        """
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_run_seconds Wall time of the run.",
+            f"# TYPE {prefix}_run_seconds gauge",
+            f"{prefix}_run_seconds {summary['elapsed_seconds']:.6f}",
+            f"# HELP {prefix}_stage_seconds_total Time spent in each stage, summed over threads.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {entry["seconds"]:.6f}'
+                  for stage, entry in summary["stages"].items()]
+        lines += [f"# HELP {prefix}_stage_calls_total Units of work done in each stage.",
+                  f"# TYPE {prefix}_stage_calls_total counter"]
+        lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {entry["count"]}'
+                  for stage, entry in summary["stages"].items()]
+
+        lines += [f"# HELP {prefix}_http_request_duration_seconds Latency of every HTTP attempt.",
+                  f"# TYPE {prefix}_http_request_duration_seconds histogram"]
+        for endpoint, entry in summary["http"].items():
+            for bound, count in entry["buckets"].items():
+                lines.append(f'{prefix}_http_request_duration_seconds_bucket'
+                             f'{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} '
+                         f'{entry["seconds"]:.6f}')
+            lines.append(f'{prefix}_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {entry["count"]}')
+
+        lines += [f"# HELP {prefix}_http_responses_total HTTP attempts by status code.",
+                  f"# TYPE {prefix}_http_responses_total counter"]
+        for endpoint, entry in summary["http"].items():
+            lines += [f'{prefix}_http_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+                      for status, count in entry["status"].items()]
+        for name, key, help_text in (("http_retries_total", "retries", "Retried HTTP attempts."),
+                                     ("http_rate_limited_total", "rate_limited", "HTTP 429 responses.")):
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+            lines += [f'{prefix}_{name}{{endpoint="{endpoint}"}} {entry[key]}'
+                      for endpoint, entry in summary["http"].items()]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Writes the metrics to path, as JSON when it ends in .json and in the
+        Prometheus textfile format otherwise. The file is replaced atomically,
+        so a textfile collector never reads a half-written file.
+        """
+        if path.endswith('.json'):
+            content = json.dumps(self.summary(), ensure_ascii=False, indent=2) + '\n'
+        else:
+            content = self.prometheus()
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, delete=False) as file:
+            file.write(content)
+        os.replace(file.name, path)
+
+
+@contextlib.contextmanager
+def profiled(path=None, profiler='cprofile'):
+    """
+    Profiles the enclosed block.
+
+    Parameters:
+    path (str): Where the profile is written; None disables profiling. cProfile
+        writes a pstats file (view with python -m pstats or snakeviz),
+        pyinstrument writes an HTML report.
+    profiler (str): 'cprofile' or 'pyinstrument'; pyinstrument must be installed.
+    """
+    if path is None:
+        yield
+        return
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(profile.output_html())
+        return
+
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+def add_arguments(parser):
+    """
+    Adds the --metrics, --profile and --profiler options shared by the command line tools.
+    """
+    parser.add_argument("--metrics", help="執行結束後寫出計時統計，.json 結尾為 JSON，其他為 Prometheus textfile 格式")
+    parser.add_argument("--profile", help="寫出效能剖析結果的檔案路徑")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile",
+                        help="效能剖析工具，pyinstrument 需另外安裝")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="列出 JSON 計時統計的摘要")
+    parser.add_argument("path", help="--metrics 寫出的 JSON 檔案")
+    args = parser.parse_args()
+
+    with open(args.path, encoding='utf-8') as file:
+        summary = json.load(file)
+    print(f"總時間 {summary['elapsed_seconds']:.2f} 秒，重試 {summary['retries']} 次，429 {summary['rate_limited']} 次")
+    for stage, entry in summary["stages"].items():
+        print(f"{stage:10} {entry['count']:6} 次  {entry['seconds']:8.2f} 秒  最長 {entry['max_seconds']:.3f} 秒")
+    for endpoint, entry in summary["http"].items():
+        print(f"{endpoint:30} {entry['count']:6} 次  平均 {entry['seconds'] / entry['count'] * 1000:.1f} ms  "
+              f"最長 {entry['max_seconds'] * 1000:.1f} ms  {entry['status']}")
@@ -1,161 +1,898 @@
+import argparse
+import contextlib
 import os
+import hashlib
+import json
+import queue
+import random
+import threading
 import dotenv
+import sys
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from community_crawlers.taichung.split_community_associations import ALL_DISTRICTS
+from dedup import drop_duplicate_associations
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+# Notion 平均每秒可接受約 3 個請求
+NOTION_RATE_LIMIT = 3
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket used to keep requests under the Notion rate limit.
+
+    Parameters:
+    rate (float): The number of tokens added to the bucket per second.
+    capacity (int): The maximum number of tokens the bucket can hold (burst size).
+    """
+
+    def __init__(self, rate=NOTION_RATE_LIMIT, capacity=NOTION_RATE_LIMIT):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then consumes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class NotionClient:
+    """
+    A Notion API client that sends every call through one keep-alive HTTP session.
+
+    Reusing the session's connection pool avoids a new TCP and TLS handshake to
+    api.notion.com on every request. Requests that get a 429 or 5xx response, or
+    that fail to connect, are retried with backoff.
+
+    Parameters:
+    notion_token (str): The authorization token for the Notion API.
+    timeout (float or tuple): The (connect, read) timeout in seconds for every request.
+    limiter (TokenBucket): Optional rate limiter, a token is taken before every attempt.
+    max_retries (int): The maximum number of retries after the first attempt.
+    backoff (float): The base delay in seconds for the exponential backoff.
+    pool_size (int): The number of keep-alive connections kept open.
+    hooks (list): Callables run after every attempt as
+        hook(method, path, status_code, elapsed, attempt); status_code is None
+        when the request raised.
+    base_url (str): The root URL of the Notion API.
+    """
+
+    def __init__(self, notion_token, timeout=(5, 30), limiter=None, max_retries=5, backoff=0.5,
+                 pool_size=10, hooks=None, base_url=NOTION_API_URL):
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hooks = list(hooks or [])
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {notion_token}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def add_hook(self, hook):
+        """
+        Registers a callable that is run after every request attempt.
+        """
+        self.hooks.append(hook)
+
+    def request(self, method, path, payload=None, limiter=None, max_retries=None):
+        """
+        Sends a request to the Notion API.
+
+        Parameters:
+        method (str): The HTTP method, e.g. 'POST'.
+        path (str): The API path relative to base_url, e.g. '/pages'.
+        payload (dict): Optional JSON body of the request.
+        limiter (TokenBucket): Overrides the client's rate limiter for this call.
+        max_retries (int): Overrides the client's retry count for this call.
+
+        Returns:
+        requests.Response: The last response received from the server.
+        """
+        limiter = limiter or self.limiter
+        max_retries = self.max_retries if max_retries is None else max_retries
+        url = self.base_url + path
+
+        for attempt in range(max_retries + 1):
+            if limiter:
+                limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._run_hooks(method, path, None, time.perf_counter() - started, attempt)
+                if attempt == max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+                continue
+            self._run_hooks(method, path, response.status_code, time.perf_counter() - started, attempt)
+
+            if response.status_code == 429:
+                # 依照 Notion 回傳的 Retry-After 等待，沒有的話退回指數退避
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after else self.backoff * 2 ** attempt
+            elif response.status_code >= 500:
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            else:
+                return response
+
+            if attempt == max_retries:
+                return response
+            time.sleep(delay)
+
+    def _run_hooks(self, method, path, status_code, elapsed, attempt):
+        for hook in self.hooks:
+            hook(method, path, status_code, elapsed, attempt)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, payload=None, **kwargs):
+        return self.request("POST", path, payload, **kwargs)
+
+    def patch(self, path, payload=None, **kwargs):
+        return self.request("PATCH", path, payload, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(notion_token):
+    """
+    Returns a shared NotionClient for a token, so that module-level functions reuse
+    one connection pool. A NotionClient passed in is returned unchanged.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API,
+        or an already configured client.
+
+    Returns:
+    NotionClient: The client to send requests with.
+    """
+    if isinstance(notion_token, NotionClient):
+        return notion_token
+    with _clients_lock:
+        if notion_token not in _clients:
+            _clients[notion_token] = NotionClient(notion_token)
+        return _clients[notion_token]
+
+
+def iter_notion_database_pages(notion_token, database_id, page_size=100, limiter=None, query_filter=None):
+    """
+    Yields every row (page) of a specified Notion database, one API page at a time.
+
+    Follows next_cursor until has_more is false, so only one page of results is
+    held in memory no matter how large the database is.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    database_id (str): The ID of the Notion database to be read.
+    page_size (int): The number of rows requested per call, at most 100.
+    limiter (TokenBucket): Optional rate limiter shared between concurrent callers.
+    query_filter (dict): Optional Notion filter object, e.g. on last_edited_time.
+
+    Yields:
+    dict: A page object as returned by the Notion API.
+    """
+    client = get_client(notion_token)
+
+    body = {"page_size": page_size}
+    if query_filter:
+        body["filter"] = query_filter
+    while True:
+        response = client.post(f"/databases/{database_id}/query", body, limiter=limiter)
+        response.raise_for_status()
+        result = response.json()
+        yield from result['results']
+        if not result.get('has_more'):
+            return
+        body["start_cursor"] = result['next_cursor']
+
+
+def iter_many_notion_databases(notion_token, districts_with_ids, max_workers=4, rate=NOTION_RATE_LIMIT, buffer_size=200,
+                               query_filters=None):
+    """
+    Reads many Notion databases concurrently and merges their rows into one stream.
+
+    Each database is paginated by its own worker thread. Rows are handed over
+    through a bounded queue, so slow consumers hold the workers back instead of
+    letting rows pile up in memory. The source database of a row is available
+    as page['parent']['database_id'].
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    districts_with_ids (list): A list of {'name': str, 'id': str} entries.
+    max_workers (int): The number of databases read at the same time.
+    rate (float): The number of requests per second shared by all workers.
+    buffer_size (int): The maximum number of rows waiting in the queue.
+    query_filters (dict): Optional Notion filter object per database ID.
+
+    Yields:
+    dict: A page object as returned by the Notion API.
+    """
+    limiter = TokenBucket(rate=rate, capacity=max(1, int(rate)))
+    pages = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(district):
+        # 使用端已停止讀取或其他資料庫出錯時，尚未開始的資料庫不再發出請求
+        if stop.is_set():
+            return
+        try:
+            query_filter = (query_filters or {}).get(district['id'])
+            for page in iter_notion_database_pages(notion_token, district['id'], limiter=limiter,
+                                                   query_filter=query_filter):
+                if not put(page):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for district in districts_with_ids:
+            executor.submit(read, district)
+        try:
+            remaining = len(districts_with_ids)
+            while remaining:
+                item = pages.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
 
 def read_notion_database(notion_token, database_id):
     """
     Reads the content of a specified Notion database.
 
     Parameters:
-    notion_token (str): The authorization token for the Notion API.
+    notion_token (str or NotionClient): The authorization token for the Notion API.
     database_id (str): The ID of the Notion database to be read.
 
     Returns:
-    dict: The content of the database as retrieved from the Notion API.
+    dict: The content of the database, with every row of every result page in 'results'.
     """
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": "2022-06-28",  # Replace with the current version of Notion
-        "Content-Type": "application/json"
-    }
+    results = list(iter_notion_database_pages(notion_token, database_id))
+    return {"object": "list", "results": results, "has_more": False, "next_cursor": None}
 
-    read_database_url = f"https://api.notion.com/v1/databases/{database_id}/query"
 
-    response = requests.post(read_database_url, headers=headers)
-    return response.json()
+def _encode_text(property_type):
+    def encode(value):
+        if value is None:
+            return {property_type: []}
+        return {property_type: [{"text": {"content": value}}]}
+    return encode
 
 
-def get_field_value(page, field_name):
-    field_type = page['properties'][field_name]['type']
-    
-    if field_type == 'rich_text':
-        return page['properties'][field_name]['rich_text'][0]['plain_text']
-    elif field_type == 'phone_number':
-        return page['properties'][field_name]['phone_number']
-    elif field_type == 'email':
-        return page['properties'][field_name]['email']
-    elif field_type == 'select':
-        if page['properties'][field_name]['select']:
-            return page['properties'][field_name]['select']['name']
-        else:
-            return None
-    elif field_type == 'title':
-        # 提取標題和相關連結
-        title_text = page['properties'][field_name]['title'][0]['plain_text']
-        title_link = page['properties'][field_name]['title'][0]['text']['link']
-        if title_link:
-            return title_text, title_link['url'] # 返回標題和連結
-        else:
-            return title_text, None # 如果沒有連結，則返回 None
-    else:
-        return None
+def _encode_plain(property_type):
+    def encode(value):
+        return {property_type: value}
+    return encode
 
-def extract_data_from_pages(pages):
-    extracted_data = []
 
-    for page in pages:
-        contact_name = get_field_value(page, '對接窗口')
-        phone_number = get_field_value(page, '電話')
-        email = get_field_value(page, 'Email')
-        tribe_name, tribe_link = get_field_value(page, '部落名稱') # 獲取部落名稱和連結
-        contact_progress = get_field_value(page, '聯絡進度')
-        willingness = get_field_value(page, '意願程度')
-        contact_method = get_field_value(page, '聯絡方式')
-
-        page_data = {
-            '聯絡人姓名': contact_name,
-            '電話號碼': phone_number,
-            '電子郵件': email,
-            '部落名稱': tribe_name,
-            '部落連結': tribe_link, # 添加部落連結
-            '聯絡進度': contact_progress,
-            '意願程度': willingness,
-            '聯絡方式': contact_method,
-        }
-
-        extracted_data.append(page_data)
-
-    return extracted_data
-
-def add_info_to_notion_database(notion_token, database_id, data):
+def _encode_select(value):
+    return {"select": {"name": value} if value is not None else None}
+
+
+def _decode_text(prop):
+    return ''.join(item['plain_text'] for item in prop[prop['type']]) or None
+
+
+def _decode_plain(prop):
+    return prop[prop['type']]
+
+
+def _decode_select(prop):
+    return prop['select']['name'] if prop['select'] else None
+
+
+# 每種屬性型別的編碼（寫入 Notion）與解碼（讀取 Notion）函式
+PROPERTY_ENCODERS = {
+    'title': _encode_text('title'),
+    'rich_text': _encode_text('rich_text'),
+    'number': _encode_plain('number'),
+    'phone_number': _encode_plain('phone_number'),
+    'email': _encode_plain('email'),
+    'select': _encode_select,
+}
+
+PROPERTY_DECODERS = {
+    'title': _decode_text,
+    'rich_text': _decode_text,
+    'number': _decode_plain,
+    'phone_number': _decode_plain,
+    'email': _decode_plain,
+    'select': _decode_select,
+}
+
+
+class NotionProperty:
     """
-    Adds a new row (page) to a specified Notion database.
+    One property (column) of a Notion database.
+
+    Parameters:
+    name (str): The property name in Notion.
+    type (str): The Notion property type, one of PROPERTY_ENCODERS.
+    options (list): (name, color) tuples for select properties.
+    column (str): The CSV column the value is imported from, None if it is maintained in Notion.
+    default: The value a new row gets when it is not imported from the CSV.
+    """
+
+    def __init__(self, name, type, options=None, column=None, default=None):
+        self.name = name
+        self.type = type
+        self.options = options
+        self.column = column
+        self.default = default
+
+    def database_property(self):
+        if self.options is not None:
+            return {self.type: {"options": [{"name": name, "color": color} for name, color in self.options]}}
+        return {self.type: {}}
+
+
+class NotionSchema:
+    """
+    A declarative description of a Notion database, used to create the database
+    and to convert rows to and from Notion properties.
+
+    The encoder and decoder of every property are looked up once here, so
+    serializing and deserializing rows is a loop over prepared functions.
+
+    Parameters:
+    properties (list): The NotionProperty objects of the database.
+    """
+
+    def __init__(self, properties):
+        self.properties = list(properties)
+        self.encoders = {prop.name: PROPERTY_ENCODERS[prop.type] for prop in self.properties}
+        self.decoders = [(prop.name, PROPERTY_DECODERS[prop.type]) for prop in self.properties]
+        # CSV 欄位 -> Notion 屬性名稱
+        self.columns = {prop.column: prop.name for prop in self.properties if prop.column}
+        self.imported_fields = list(self.columns.values())
+        self.defaults = {prop.name: prop.default for prop in self.properties if not prop.column}
+
+    def database_properties(self):
+        """
+        Returns the 'properties' of the request body that creates the database.
+        """
+        return {prop.name: prop.database_property() for prop in self.properties}
+
+    def encode(self, data, fields=None):
+        """
+        Converts a row into Notion page properties.
+
+        Parameters:
+        data (dict): The row, keyed by property name.
+        fields (list): The properties to encode, all of them by default.
+
+        Returns:
+        dict: The page 'properties' expected by the Notion API.
+        """
+        encoders = self.encoders
+        return {name: encoders[name](data[name]) for name in (fields or encoders)}
+
+    def decode(self, page, fields=None):
+        """
+        Converts the properties of a Notion page back into a row.
+
+        Parameters:
+        page (dict): A page object as returned by the Notion API.
+        fields (list): The properties to decode, all of them by default.
+
+        Returns:
+        dict: The row, keyed by property name.
+        """
+        properties = page['properties']
+        decoders = self.decoders if fields is None else [
+            (name, decoder) for name, decoder in self.decoders if name in fields]
+        return {name: decoder(properties[name]) if name in properties else None
+                for name, decoder in decoders}
+
+    def decode_many(self, pages, fields=None):
+        """
+        Lazily decodes an iterable of pages, e.g. from iter_notion_database_pages.
+        """
+        for page in pages:
+            yield self.decode(page, fields)
+
+
+# 各區社區發展協會資料庫的結構
+ASSOCIATION_SCHEMA = NotionSchema([
+    NotionProperty("電話", "phone_number", column="phone"),
+    NotionProperty("社區名稱", "title", column="name"),
+    NotionProperty("對接窗口", "rich_text", column="contact_person"),
+    NotionProperty("職稱", "rich_text", column="title"),
+    NotionProperty("Email", "email", column="email"),
+    NotionProperty("人口數量", "number", column="population"),
+    NotionProperty("地址", "rich_text", column="address"),
+    NotionProperty("聯絡進度", "select", default="待聯絡", options=[
+        ("已聯絡", "blue"), ("待聯絡", "green")]),
+    NotionProperty("意願程度", "select", default="None", options=[
+        ("不方便", "red"), ("當面了解", "yellow"), ("願意合作", "green"), ("None", "gray")]),
+    NotionProperty("聯絡方式", "select", default="None", options=[
+        ("電訪+Email", "blue"), ("電訪", "yellow"), ("Email", "green"), ("None", "gray")]),
+])
+
+
+def iter_data_from_pages(pages, schema=ASSOCIATION_SCHEMA):
+    """
+    Lazily extracts the row data from an iterable of Notion pages.
+
+    Parameters:
+    pages (iterable): Page objects, e.g. from iter_notion_database_pages.
+    schema (NotionSchema): The structure of the database the pages belong to.
+
+    Yields:
+    dict: The extracted data of one page, keyed by property name.
+    """
+    return schema.decode_many(pages)
+
+
+def extract_data_from_pages(pages, schema=ASSOCIATION_SCHEMA):
+    return list(iter_data_from_pages(pages, schema))
+
+
+def build_page_data(database_id, data, schema=ASSOCIATION_SCHEMA):
+    """
+    Builds the request body for a new row (page) in a specified Notion database.
 
     Parameters:
-    notion_token (str): The authorization token for the Notion API.
     database_id (str): The ID of the Notion database where the row will be added.
     data (dict): The data for the new row.
+    schema (NotionSchema): The structure of the database.
 
     Returns:
-    dict: The response from the Notion API.
+    dict: The page payload expected by the Notion API.
     """
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
+    return {
+        "parent": {"database_id": database_id},
+        "properties": schema.encode(data)
     }
 
-    create_page_url = f"https://api.notion.com/v1/pages"
 
-    page_data = {
-        "parent": {"database_id": database_id},
-        "properties": {
-            "對接窗口": {"rich_text": [{"text": {"content": data['對接窗口']}}]},
-            "電話": {"phone_number": data['電話']},
-            "Email": {"email": data['Email']},
-            "社區名稱": {"title": [{"text": {"content": data['社區名稱']}}]},
-            "職稱": {"rich_text": [{"text": {"content": data['職稱']}}]},
-            "人口數量": {"number": data['人口數量']},
-            "地址": {"rich_text": [{"text": {"content": data['地址']}}]},
-            "聯絡進度": {"select": {"name": data['聯絡進度']}},
-            "意願程度": {"select": {"name": data['意願程度']}},
-            "聯絡方式": {"select": {"name": data['聯絡方式']}}
-        }
-    }
+def add_info_to_notion_database(notion_token, database_id, data, limiter=None, max_retries=None):
+    """
+    Adds a new row (page) to a specified Notion database.
 
-    response = requests.post(create_page_url, headers=headers, json=page_data)
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    database_id (str): The ID of the Notion database where the row will be added.
+    data (dict): The data for the new row.
+    limiter (TokenBucket): Optional rate limiter shared between concurrent callers.
+    max_retries (int): The maximum number of retries on 429 and 5xx responses, None for the client default.
+
+    Returns:
+    dict: The response from the Notion API.
+    """
+    page_data = build_page_data(database_id, data)
+    response = get_client(notion_token).post("/pages", page_data, limiter=limiter, max_retries=max_retries)
     return response.json()
 
 
-# Write a function to add many info into database
-def add_many_info_to_notion_database(notion_token, database_id, data_list):
+def iter_notion_requests(notion_token, calls, max_workers=4, rate=NOTION_RATE_LIMIT, max_retries=None, on_result=None,
+                         window=None):
     """
-    Adds a new row (page) to a specified Notion database.
+    Sends many Notion API requests concurrently and yields their results in input order.
+
+    Requests are sent from a bounded thread pool and share one token bucket, so the
+    batch runs at the Notion rate limit instead of at the speed of one round trip.
+    Calls are pulled from the iterable only as fast as they can be sent, so a
+    generator of calls is never read far ahead.
 
     Parameters:
-    notion_token (str): The authorization token for the Notion API.
-    database_id (str): The ID of the Notion database where the row will be added.
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    calls (iterable): (method, path, payload) tuples, one per request.
+    max_workers (int): The number of requests allowed in flight at once.
+    rate (float): The number of requests per second allowed by the token bucket.
+    max_retries (int): The maximum number of retries on 429 and 5xx responses, None for the client default.
+    on_result (callable): Optional callback run from the worker thread with each
+        result dict as soon as its request finishes.
+    window (int): The number of calls submitted ahead of the oldest unfinished one,
+        twice max_workers by default.
+
+    Yields:
+    dict: One result per request with the keys 'index', 'ok', 'response' and 'error'.
+    """
+    client = get_client(notion_token)
+    limiter = TokenBucket(rate=rate, capacity=max(1, int(rate)))
+    window = window or max_workers * 2
+
+    def send(index, method, path, payload):
+        result = {'index': index, 'ok': False, 'response': None, 'error': None}
+        try:
+            response = client.request(method, path, payload, limiter=limiter,
+                                      max_retries=max_retries).json()
+        except Exception as e:
+            result['error'] = str(e)
+        else:
+            result['response'] = response
+            if response.get('object') == 'error':
+                result['error'] = response.get('message')
+            else:
+                result['ok'] = True
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque()
+        for index, (method, path, payload) in enumerate(calls):
+            futures.append(executor.submit(send, index, method, path, payload))
+            if len(futures) >= window:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def run_notion_requests(notion_token, calls, **kwargs):
+    """
+    Sends many Notion API requests concurrently.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    calls (iterable): (method, path, payload) tuples, one per request.
+    **kwargs: Passed through to iter_notion_requests, e.g. max_workers or on_result.
+
+    Returns:
+    list: One result dict per request, in input order, with the keys 'index',
+    'ok', 'response' and 'error'.
+    """
+    return list(iter_notion_requests(notion_token, calls, **kwargs))
+
+
+def bulk_add_info_to_notion_database(notion_token, items, **kwargs):
+    """
+    Adds many rows to one or more Notion databases concurrently.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    items (list): A list of {'database_id': str, 'data': dict} entries, one per row.
+    **kwargs: Passed through to run_notion_requests.
+
+    Returns:
+    list: One result dict per row, in input order, with the keys 'index',
+    'database_id', 'ok', 'response' and 'error'.
+    """
+    calls = [("POST", "/pages", build_page_data(item['database_id'], item['data'])) for item in items]
+    results = run_notion_requests(notion_token, calls, **kwargs)
+    for result, item in zip(results, items):
+        result['database_id'] = item['database_id']
+    return results
+
+
+def add_many_info_to_notion_database(notion_token, database_id, data_list, **kwargs):
+    """
+    Adds many new rows (pages) to a specified Notion database.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    database_id (str): The ID of the Notion database where the rows will be added.
     data_list (list): The list of data for the new rows.
+    **kwargs: Passed through to batch_add_info_to_notion_database, e.g. checkpoint_path.
 
     Returns:
-    dict: The response from the Notion API.
+    ImportResult: The created page IDs and errors of the import.
+    """
+    items = [{'database_id': database_id, 'data': data} for data in data_list]
+    return batch_add_info_to_notion_database(notion_token, items, **kwargs)
+
+
+# 由 CSV 同步到 Notion 的欄位；聯絡進度、意願程度、聯絡方式由人工在 Notion 上維護，同步時不覆蓋
+SYNCED_FIELDS = ASSOCIATION_SCHEMA.imported_fields
+
+
+def _normalize_value(value):
+    if value is None or value != value:  # None 或 NaN
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def row_key(data):
+    """
+    Returns the key used to match a CSV row with an existing Notion page.
+    """
+    return (_normalize_value(data['社區名稱']), _normalize_value(data['地址']))
+
+
+def content_hash(data):
+    """
+    Returns a hash of the synced fields of a row, used to detect changed rows.
+    """
+    values = [_normalize_value(data.get(field)) for field in SYNCED_FIELDS]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def page_to_data(page):
+    """
+    Converts a Notion page back into the row format used by build_page_data.
+    """
+    return ASSOCIATION_SCHEMA.decode(page, SYNCED_FIELDS)
+
+
+def plan_sync(database_id, pages, data_list, archive_missing=True):
+    """
+    Compares the existing pages of a database with the rows that should be in it.
+
+    Parameters:
+    database_id (str): The ID of the Notion database.
+    pages (iterable): The existing pages of the database.
+    data_list (list): The rows that should be in the database.
+    archive_missing (bool): Whether pages without a matching row are archived.
+
+    Returns:
+    list: (action, method, path, payload) tuples, where action is one of
+    'create', 'update' or 'archive'. Unchanged rows produce no entry.
     """
+    existing = {}
+    operations = []
+    for page in pages:
+        data = page_to_data(page)
+        key = row_key(data)
+        if key in existing:
+            # 重複的頁面只保留第一筆
+            operations.append(("archive", "PATCH", f"/pages/{page['id']}", {"archived": True}))
+        else:
+            existing[key] = (page['id'], content_hash(data))
+
+    seen = set()
     for data in data_list:
-        add_info_to_notion_database(notion_token, database_id, data)
+        key = row_key(data)
+        if key in seen:
+            continue
+        seen.add(key)
+        if key not in existing:
+            operations.append(("create", "POST", "/pages", build_page_data(database_id, data)))
+            continue
+        page_id, page_hash = existing[key]
+        if page_hash != content_hash(data):
+            payload = {"properties": ASSOCIATION_SCHEMA.encode(data, SYNCED_FIELDS)}
+            operations.append(("update", "PATCH", f"/pages/{page_id}", payload))
 
-def create_notion_database(notion_token, parent_page_id, database_title):
+    if archive_missing:
+        for key, (page_id, _) in existing.items():
+            if key not in seen:
+                operations.append(("archive", "PATCH", f"/pages/{page_id}", {"archived": True}))
+    return operations
+
+
+def plan_sync_databases(notion_token, items, archive_missing=True):
     """
-    Creates a new Notion database under a specified parent page.
+    Reads the existing pages of every target database and plans the requests
+    that bring them in line with the rows, without sending any of them.
 
     Parameters:
-    notion_token (str): The authorization token for the Notion API.
-    parent_page_id (str): The ID of the parent page where the database will be created.
-    database_title (str): The title of the new database.
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    items (list): A list of {'database_id': str, 'data': dict} entries, one per row.
+    archive_missing (bool): Whether pages without a matching row are archived.
+
+    Returns:
+    list: The (action, method, path, payload) tuples of plan_sync for every database.
     """
-    # 設定 API endpoint
-    url = "https://api.notion.com/v1/databases"
+    rows_by_database = {}
+    for item in items:
+        rows_by_database.setdefault(item['database_id'], []).append(item['data'])
 
-    # 設定請求頭
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2021-08-16"  # 使用最新的 Notion API 版本
-    }
+    operations = []
+    for database_id, data_list in rows_by_database.items():
+        pages = iter_notion_database_pages(notion_token, database_id)
+        operations.extend(plan_sync(database_id, pages, data_list, archive_missing=archive_missing))
+    return operations
+
+
+def sync_notion_databases(notion_token, items, archive_missing=True, **kwargs):
+    """
+    Brings one or more Notion databases in line with a list of rows.
+
+    Each database is read once and indexed by 社區名稱 plus 地址; only rows whose
+    content hash differs are created or updated, duplicate pages are archived, and
+    pages without a matching row are archived when archive_missing is set.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    items (list): A list of {'database_id': str, 'data': dict} entries, one per row.
+    archive_missing (bool): Whether pages without a matching row are archived.
+    **kwargs: Passed through to run_notion_requests.
+
+    Returns:
+    dict: The number of 'create', 'update' and 'archive' operations, and the
+    per-request 'results' with an added 'action' key.
+    """
+    operations = plan_sync_databases(notion_token, items, archive_missing=archive_missing)
+    results = run_notion_requests(notion_token, [operation[1:] for operation in operations], **kwargs)
+    summary = {"create": 0, "update": 0, "archive": 0, "results": results}
+    for result, operation in zip(results, operations):
+        result['action'] = operation[0]
+        summary[operation[0]] += 1
+    return summary
 
+
+class ImportResult:
+    """
+    The outcome of a batch import.
+
+    Attributes:
+    created (dict): Input index -> ID of the page created for that row.
+    errors (dict): Input index -> error message of the rows that failed.
+    skipped (list): Input indexes already imported according to the checkpoint.
+    """
+
+    def __init__(self):
+        self.created = {}
+        self.errors = {}
+        self.skipped = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __repr__(self):
+        return (f"ImportResult(created={len(self.created)}, errors={len(self.errors)}, "
+                f"skipped={len(self.skipped)})")
+
+
+def checkpoint_key(item):
+    """
+    Returns the key identifying an import item in a checkpoint file.
+    """
+    name, address = row_key(item['data'])
+    return f"{item['database_id']}|{name}|{address}"
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Reads a checkpoint file written by batch_add_info_to_notion_database.
+
+    Returns:
+    dict: Checkpoint key -> ID of the page created for that row.
+    """
+    done = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 程式中斷時最後一行可能只寫了一半
+                continue
+            done[entry['key']] = entry['page_id']
+    return done
+
+
+def batch_add_info_to_notion_database(notion_token, items, concurrency=4, checkpoint_path=None,
+                                      group_by_database=True, **kwargs):
+    """
+    Adds many rows to one or more Notion databases, resuming from a checkpoint.
+
+    The Notion API creates one page per request, so rows are grouped per target
+    database and fed through the rate-limited work queue of iter_notion_requests.
+    Every created page is appended to the checkpoint file as soon as it exists;
+    running the same import again skips those rows instead of duplicating them.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    items (iterable): {'database_id': str, 'data': dict} entries, one per row.
+    concurrency (int): The number of requests allowed in flight at once.
+    checkpoint_path (str): Optional JSON Lines file recording the imported rows.
+    group_by_database (bool): Whether to read all items first and send them grouped
+        per database. Pass False to stream items from a generator as they arrive.
+    **kwargs: Passed through to iter_notion_requests, e.g. rate.
+
+    Returns:
+    ImportResult: The created page IDs and errors, keyed by input index.
+    """
+    result = ImportResult()
+    done = load_checkpoint(checkpoint_path)
+    lock = threading.Lock()
+
+    entries = enumerate(items)
+    if group_by_database:
+        grouped = {}
+        for index, item in entries:
+            grouped.setdefault(item['database_id'], []).append((index, item))
+        entries = (entry for rows in grouped.values() for entry in rows)
+
+    # 已送出請求的位置 -> (輸入位置, checkpoint key)
+    in_flight = {}
+
+    def calls():
+        position = 0
+        for index, item in entries:
+            key = checkpoint_key(item)
+            with lock:
+                if key in done:
+                    result.skipped.append(index)
+                    result.created[index] = done[key]
+                    continue
+                in_flight[position] = (index, key)
+            position += 1
+            yield "POST", "/pages", build_page_data(item['database_id'], item['data'])
+
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+
+    def record(request_result):
+        with lock:
+            index, key = in_flight.pop(request_result['index'])
+            if not request_result['ok']:
+                result.errors[index] = request_result['error']
+                return
+            page_id = request_result['response']['id']
+            result.created[index] = page_id
+            if checkpoint:
+                checkpoint.write(json.dumps({'key': key, 'page_id': page_id}, ensure_ascii=False) + '\n')
+                checkpoint.flush()
+
+    try:
+        # 結果已由 record 收集，這裡只需要把請求全部送完
+        for _ in iter_notion_requests(notion_token, calls(), max_workers=concurrency, on_result=record, **kwargs):
+            pass
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    return result
+
+
+def build_database_data(parent_page_id, database_title, schema=ASSOCIATION_SCHEMA):
+    """
+    Builds the request body for a new Notion database under a specified parent page.
+    """
     # 定義資料庫的結構
-    data = {
+    return {
         "parent": {"type": "page_id", "page_id": parent_page_id},
         "title": [
             {
@@ -163,86 +900,262 @@ def create_notion_database(notion_token, parent_page_id, database_title):
                 "text": {"content": database_title}
             }
         ],
-        "properties": {
-            "電話": {"phone_number": {}},
-            "社區名稱": {"title": {}},
-            "對接窗口": {"rich_text": {}},
-            "職稱": {"rich_text": {}},
-            "Email": {"email": {}},
-            "人口數量":{"number":{}},
-            "地址": {"rich_text": {}},
-            "聯絡進度": {"select": {
-                "options": [
-                    {"name": "已聯絡", "color": "blue"},
-                    {"name": "待聯絡", "color": "green"}
-                ]
-            }},
-            "意願程度": {"select": {
-                "options": [
-                    {"name": "不方便", "color": "red"},
-                    {"name": "當面了解", "color": "yellow"},
-                    {"name": "願意合作", "color": "green"},
-                    {"name": "None", "color": "gray"}
-                ]
-            }},
-            "聯絡方式": {"select": {
-                "options": [
-                    {"name": "電訪+Email", "color": "blue"},
-                    {"name": "電訪", "color": "yellow"},
-                    {"name": "Email", "color": "green"},
-                    {"name": "None", "color": "gray"}
-                ]
-            }}
-        }
+        "properties": schema.database_properties()
     }
 
-    # 發送請求
-    response = requests.post(url, headers=headers, json=data)
-    database_id = response.json().get('id', None)
-
-    # 返回響應
-    return database_id
-
-def main():
-    districts_with_ids = [
-        {"name": "中區", "id": "db21b6d1-7cec-4ed7-be92-9bc3377e9ed9"},
-        {"name": "東區", "id": "9b8329c7-e496-4ecb-998c-2a313bb3dbb1"},
-        {"name": "西區", "id": "cb277c71-a6fa-41e4-b6f5-b71cffc012ec"},
-        {"name": "南區", "id": "03cda376-5020-4178-bd2a-ea035c0f98d4"},
-        {"name": "北區", "id": "9dddfd64-b79f-4c43-b72b-d6d3afab01db"},
-        {"name": "西屯區", "id": "c1b715ee-a604-4a7b-bc93-771dbcc97bae"},
-        {"name": "南屯區", "id": "30056130-67cb-4bd8-a38d-23759d5362a9"},
-        {"name": "北屯區", "id": "1934473a-fd4e-4720-a1d6-f4bf4d0b2681"},
-        {"name": "豐原區", "id": "9da5cc8c-7f7c-446b-b78f-8e30fc052aa0"},
-        {"name": "大里區", "id": "456c2bc8-1b9b-4c0d-8df4-765a9f7b182d"},
-        {"name": "太平區", "id": "e37416ba-ab10-4a7d-a29b-e0374145a2f3"},
-        {"name": "東勢區", "id": "8aebfab7-fa7a-4d8d-a424-a62169b4f250"},
-        {"name": "大甲區", "id": "6e719c7d-5b68-4be2-aa0a-d8d6ca79759f"},
-        {"name": "清水區", "id": "5611a974-0b85-454d-b4ba-34917cdc55f3"},
-        {"name": "沙鹿區", "id": "cb60bb78-11e5-4e3d-b551-4b1b7f3ebed9"},
-        {"name": "梧棲區", "id": "f5d3b75c-7577-471f-86ef-167f126d0903"},
-        {"name": "后里區", "id": "e3f75277-a6f2-4286-9f38-b6e6841c098a"},
-        {"name": "神岡區", "id": "60751b1d-5fd1-470b-91fe-36315a81b980"},
-        {"name": "潭子區", "id": "0f8be5d3-3efb-492a-9b49-71819841af27"},
-        {"name": "大雅區", "id": "1f7f2da8-bd8b-49e0-a41a-30868f10a063"},
-        {"name": "新社區", "id": "8831e250-038c-4208-abe6-017cca78af69"},
-        {"name": "石岡區", "id": "8197d413-e21a-444f-897a-92f82dfb6209"},
-        {"name": "外埔區", "id": "4c652c26-14a4-40ce-b21a-b669429db49d"},
-        {"name": "大安區", "id": "30f111be-103d-4e40-b19e-23b4e590a741"},
-        {"name": "烏日區", "id": "7a99a34b-318e-47c0-93b5-484534ebd87e"},
-        {"name": "大肚區", "id": "13cef29c-5ab8-4aa7-96ff-7b015b0e5f19"},
-        {"name": "龍井區", "id": "61e6d1df-a748-4538-be74-812dc06e0b47"},
-        {"name": "霧峰區", "id": "ebf2de69-eae0-4ca1-bd6c-fbe2670071ad"},
-        {"name": "和平區", "id": "609f25de-9207-469b-849e-2075f19054e8"}
-    ]
+
+def create_notion_database(notion_token, parent_page_id, database_title, schema=ASSOCIATION_SCHEMA):
+    """
+    Creates a new Notion database under a specified parent page.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    parent_page_id (str): The ID of the parent page where the database will be created.
+    database_title (str): The title of the new database.
+    schema (NotionSchema): The structure of the new database.
+    """
+    data = build_database_data(parent_page_id, database_title, schema)
+
+    # 發送請求，失敗時拋出 requests.HTTPError
+    response = get_client(notion_token).post("/databases", data)
+    response.raise_for_status()
+
+    # 返回新資料庫的 ID
+    return response.json()['id']
+
+
+def find_notion_databases(notion_token, parent_page_id=None):
+    """
+    Lists the databases shared with the integration, optionally only those under one page.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    parent_page_id (str): Only return databases created directly under this page.
+
+    Returns:
+    dict: Database title -> database ID.
+    """
+    client = get_client(notion_token)
+    body = {"filter": {"property": "object", "value": "database"}, "page_size": 100}
+    databases = {}
+    while True:
+        response = client.post("/search", body)
+        response.raise_for_status()
+        result = response.json()
+        for database in result['results']:
+            parent = database.get('parent', {}).get('page_id') or ''
+            if parent_page_id and parent.replace('-', '') != parent_page_id.replace('-', ''):
+                continue
+            title = ''.join(item['plain_text'] for item in database.get('title', []))
+            databases.setdefault(title, database['id'])
+        if not result.get('has_more'):
+            return databases
+        body["start_cursor"] = result['next_cursor']
+
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notion_districts.json')
+
+
+def load_district_registry(registry_path=REGISTRY_PATH):
+    """
+    Reads the district name -> database ID registry written by provision_district_databases.
+
+    Returns:
+    list: {'name': str, 'id': str} entries, empty when the registry does not exist.
+    """
+    if not os.path.exists(registry_path):
+        return []
+    with open(registry_path, encoding='utf-8') as file:
+        return [{"name": name, "id": database_id} for name, database_id in json.load(file).items()]
+
+
+def save_district_registry(districts_with_ids, registry_path=REGISTRY_PATH):
+    with open(registry_path, 'w', encoding='utf-8') as file:
+        json.dump({district['name']: district['id'] for district in districts_with_ids},
+                  file, ensure_ascii=False, indent=4)
+        file.write('\n')
+
+
+def provision_district_databases(notion_token, parent_page_id, districts, city='臺中市',
+                                 registry_path=REGISTRY_PATH, max_workers=4):
+    """
+    Makes sure every district has a database under the parent page and records the IDs.
+
+    Existing databases are looked up by title first ("臺中市中區" or just "中區"),
+    so running this again only creates the districts that are still missing.
+    The missing databases are created concurrently, and the name -> ID mapping
+    is written to the registry file the import loads at startup.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    parent_page_id (str): The ID of the page the databases are created under.
+    districts (list): The district names, e.g. ALL_DISTRICTS.
+    city (str): The city prefix of the database titles.
+    registry_path (str): The JSON file the mapping is written to.
+    max_workers (int): The number of databases created at the same time.
+
+    Returns:
+    list: {'name': str, 'id': str} entries for every district, in the given order.
+    """
+    existing = find_notion_databases(notion_token, parent_page_id)
+    database_ids = {}
+    for district in districts:
+        database_id = existing.get(f"{city}{district}") or existing.get(district)
+        if database_id:
+            database_ids[district] = database_id
+
+    missing = [district for district in districts if district not in database_ids]
+    # 建立資料庫也受速率限制，共用 client 的重試與退避
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        created = executor.map(
+            lambda district: create_notion_database(notion_token, parent_page_id, f"{city}{district}"),
+            missing)
+        database_ids.update(zip(missing, created))
+
+    districts_with_ids = [{"name": district, "id": database_ids[district]} for district in districts]
+    save_district_registry(districts_with_ids, registry_path)
+    return districts_with_ids
+
+
+# CSV 欄位 -> Notion 屬性名稱
+CSV_COLUMNS = ASSOCIATION_SCHEMA.columns
+
+# CSV 檔案中未提供的欄位，新增時使用的預設值
+DEFAULT_VALUES = ASSOCIATION_SCHEMA.defaults
+
+
+def load_associations(file_paths):
+    """
+    Reads the district CSV files into one DataFrame.
+
+    Parameters:
+    file_paths (dict): A mapping of district name to CSV file path.
+
+    Returns:
+    pandas.DataFrame: All rows, with the district name in a 'district' column.
+    """
+    # pandas 只有讀取 CSV 時才需要，延後載入讓讀取與建立資料庫的指令啟動得更快
+    import pandas as pd
+
+    frames = [pd.read_csv(file_path, dtype=str).assign(district=district)
+              for district, file_path in file_paths.items()]
+    return pd.concat(frames, ignore_index=True)
+
+
+def clean_associations(df):
+    """
+    Cleans the scraped columns with vectorized string operations.
+
+    The population ("2,332 人") becomes an int with 0 for missing values, phone
+    numbers and emails are trimmed and normalized, missing emails become 'None'
+    and other missing text becomes an empty string.
+
+    Parameters:
+    df (pandas.DataFrame): The rows from load_associations.
+
+    Returns:
+    pandas.DataFrame: A cleaned copy of df.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    population = df['population'].astype('string').str.replace(r'\D', '', regex=True)
+    df['population'] = pd.to_numeric(population, errors='coerce').fillna(0).astype(int)
+
+    phone = df['phone'].astype('string').str.strip()
+    phone = phone.str.replace(r'\s+', '', regex=True).str.replace(r'^\((\d+)\)', r'\1-', regex=True)
+    df['phone'] = phone.astype(object).where(phone.fillna('') != '', None)
+
+    email = df['email'].astype('string').str.strip().str.lower()
+    df['email'] = email.astype(object).where(email.fillna('') != '', 'None')
+
+    for column in ('contact_person', 'name', 'title', 'address'):
+        df[column] = df[column].astype('string').str.strip().fillna('').astype(object)
+    return df
+
+
+def iter_import_items(df, district_id_map):
+    """
+    Lazily turns cleaned rows into the {'database_id', 'data'} items used by the
+    bulk upload and sync functions.
+
+    Parameters:
+    df (pandas.DataFrame): The rows from clean_associations.
+    district_id_map (dict): A mapping of district name to Notion database ID.
+
+    Yields:
+    dict: One {'database_id': str, 'data': dict} item per row.
+
+    Raises:
+    LookupError: When a district of df has no database ID in district_id_map.
+    """
+    missing = sorted(set(df['district']) - set(district_id_map))
+    if missing:
+        raise LookupError(f"沒有這些區的 Notion 資料庫 ID：{'、'.join(missing)}，請先執行 provision 建立資料庫")
+    database_ids = df['district'].map(district_id_map).tolist()
+    fields = list(CSV_COLUMNS.values())
+    # tolist() 轉成 Python 原生型別，避免 numpy 型別無法序列化成 JSON
+    columns = [df[column].tolist() for column in CSV_COLUMNS]
+    for database_id, values in zip(database_ids, zip(*columns)):
+        data = dict(zip(fields, values))
+        data.update(DEFAULT_VALUES)
+        yield {'database_id': database_id, 'data': data}
+
+
+# 各區資料庫名稱與 Notion 資料庫 ID 的對應，由 provision_district_databases 產生
+DISTRICTS_WITH_IDS = load_district_registry()
+
+
+def print_dry_run(calls, note="未連線到 Notion"):
+    """
+    Prints the requests a run would send as JSON Lines, without sending them.
+
+    Parameters:
+    calls (iterable): (method, path, payload) tuples.
+    note (str): What the run did instead, printed in the summary.
+
+    Returns:
+    int: The number of requests printed.
+    """
+    count = 0
+    for method, path, payload in calls:
+        print(json.dumps({"method": method, "path": path, "payload": payload}, ensure_ascii=False))
+        count += 1
+    print(f"dry run：共 {count} 個請求，{note}", file=sys.stderr)
+    return count
+
+
+def main(sync=False, checkpoint_path='notion_import_checkpoint.jsonl', provision=False, metrics=None,
+         dry_run=False):
     NOTION_TOKEN = os.getenv("INTERNAL_INTEGRATION_SECRET")
+    # metrics 為 metrics.Metrics 時記錄各階段的時間與每個 API 端點的延遲
+    if metrics:
+        get_client(NOTION_TOKEN).add_hook(metrics)
+
+    def stage(name):
+        return metrics.timer(name) if metrics else contextlib.nullcontext()
+
     # DATABASE_ID = os.getenv("DATABASE_ID")
     PAGE_ID = os.getenv("PAGE_ID")
+    districts_with_ids = DISTRICTS_WITH_IDS
+    if provision and dry_run:
+        # 不查詢 Notion，以本機的 notion_districts.json 判斷缺少哪些區
+        registered = {district['name'] for district in districts_with_ids}
+        print_dry_run(("POST", "/databases", build_database_data(PAGE_ID, f"臺中市{district}"))
+                      for district in ALL_DISTRICTS if district not in registered)
+        return
+    if provision:
+        districts_with_ids = provision_district_databases(NOTION_TOKEN, PAGE_ID, ALL_DISTRICTS)
+        print(f"已記錄 {len(districts_with_ids)} 個區的資料庫 ID 到 {REGISTRY_PATH}")
+        return
     # results_json = read_notion_database(NOTION_TOKEN, DATABASE_ID)
     # Process your data using the functions
     # 'your_json_data' is the JSON data obtained from Notion API
     # pages = results_json['results']
     # extracted_data = extract_data_from_pages(pages)
+    # 大型資料庫可以改用串流讀取，記憶體用量不會隨資料量成長
+    # pages = iter_many_notion_databases(NOTION_TOKEN, DISTRICTS_WITH_IDS)
+    # extracted_data = iter_data_from_pages(pages)
 
     # Print the results
     # for data in extracted_data:
@@ -263,15 +1176,7 @@ def main():
     #         '聯絡方式': 'None'   # CSV 檔案中未提供這個資訊
     #     }
     # print(add_info_to_notion_database(NOTION_TOKEN, "db21b6d17cec4ed7be929bc3377e9ed9", data))
-    # 使用函式
-    # database_title = '霧峰區'
-
-    # response = create_notion_database(NOTION_TOKEN,PAGE_ID,database_title)
-    # print(response)
-    # districts = ["石岡區"]
-    # for district in districts:
-    #     database_id = create_notion_database(NOTION_TOKEN, PAGE_ID, f"臺中市{district}")
-    #     print(f"Database created for {district} District with ID: {database_id}")
+    # 建立缺少的各區資料庫並更新 notion_districts.json：python notion_functions.py --provision
     
     # CSV 檔案路徑與區域的對應
     file_paths = {
@@ -308,39 +1213,69 @@ def main():
 
     # 將各個區域名稱與對應的 ID 對應起來
     district_id_map = {district['name']: district['id'] for district in districts_with_ids}
-    # 讀取 CSV 檔案並轉換為 data_example 格式，然後添加到 data_list
-    data_list = []
-    for district, file_path in file_paths.items():
-        district_data = pd.read_csv(file_path)
-        for _, row in district_data.iterrows():
-            population_str = str(row['population'])
-            # 检查字符串是否为 'nan'
-            if population_str.lower() == 'nan':
-                cleaned_population = 0
-            else:
-                cleaned_population = int(population_str.replace(',', '').replace(' 人', ''))
-            data_example = {
-                '對接窗口': row['contact_person'],
-                '電話': row['phone'],
-                'Email': row['email'] if pd.notna(row['email']) else 'None',
-                '社區名稱': row['name'],
-                '職稱': row['title'],
-                '人口數量':cleaned_population,
-                '地址': row['address'],
-                '聯絡進度': '待聯絡',  # CSV 檔案中未提供這個資訊
-                '意願程度': 'None',  # CSV 檔案中未提供這個資訊
-                '聯絡方式': 'None'   # CSV 檔案中未提供這個資訊
-            }
-            data_list.append({'database_id': district_id_map[district], 'data': data_example})
-    for item in data_list:
-        database_id = item['database_id']
-        data = item['data']
-        print(add_info_to_notion_database(NOTION_TOKEN, database_id, data))
-        time.sleep(0.1)
+    # 讀取 CSV 檔案並轉換為 Notion 匯入格式
+    with stage('transform'):
+        associations = clean_associations(load_associations(file_paths))
+        # 重複的協會在上傳前移除，不浪費 API 請求
+        unique_associations = drop_duplicate_associations(associations)
+        try:
+            data_list = list(iter_import_items(unique_associations, district_id_map))
+        except LookupError as e:
+            sys.exit(str(e))
+    if len(unique_associations) < len(associations):
+        print(f"移除 {len(associations) - len(unique_associations)} 筆重複資料", file=sys.stderr if dry_run else None)
+    if dry_run and sync:
+        # 同步需要讀取現有頁面才能比對，只讀取不修改
+        with stage('plan'):
+            operations = plan_sync_databases(NOTION_TOKEN, data_list)
+        print_dry_run((operation[1:] for operation in operations), note="只讀取了現有頁面，未修改 Notion")
+        return
+    if dry_run:
+        # 與實際匯入相同，略過 checkpoint 中已新增的資料
+        done = load_checkpoint(checkpoint_path)
+        pending = [item for item in data_list if checkpoint_key(item) not in done]
+        if len(pending) < len(data_list):
+            print(f"略過 {checkpoint_path} 中先前已新增的 {len(data_list) - len(pending)} 筆", file=sys.stderr)
+        print_dry_run(("POST", "/pages", build_page_data(item['database_id'], item['data'])) for item in pending)
+        return
+    if sync:
+        with stage('upload'):
+            summary = sync_notion_databases(NOTION_TOKEN, data_list)
+        for result in summary['results']:
+            if not result['ok']:
+                print(f"{result['action']} 失敗: {result['error']}")
+        print(f"新增 {summary['create']} 筆，更新 {summary['update']} 筆，封存 {summary['archive']} 筆")
+        return
+
+    with stage('upload'):
+        result = batch_add_info_to_notion_database(NOTION_TOKEN, data_list, checkpoint_path=checkpoint_path)
+    for index, error in sorted(result.errors.items()):
+        name = data_list[index]['data']['社區名稱']
+        print(f"新增失敗 {name}: {error}")
+    print(f"成功新增 {len(result.created) - len(result.skipped)} 筆，"
+          f"略過先前已新增的 {len(result.skipped)} 筆，失敗 {len(result.errors)} 筆")
 
 if __name__ == "__main__":
+    import metrics as run_metrics
+
     dotenv.load_dotenv()
-    main()
+    parser = argparse.ArgumentParser(description="將各區社區發展協會資料匯入 Notion")
+    parser.add_argument("--sync", action="store_true",
+                        help="只新增、更新或封存有變動的資料，而不是全部重新新增")
+    parser.add_argument("--checkpoint", default="notion_import_checkpoint.jsonl",
+                        help="記錄已新增資料的檔案，中斷後重新執行會從這裡接續")
+    parser.add_argument("--provision", action="store_true",
+                        help="在 PAGE_ID 頁面下建立缺少的各區資料庫，並更新 notion_districts.json")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="只列出會送出的請求內容（JSON Lines），不修改 Notion；--sync 時會讀取現有頁面")
+    run_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    collected = run_metrics.Metrics() if args.metrics else None
+    with run_metrics.profiled(args.profile, args.profiler):
+        main(sync=args.sync, checkpoint_path=args.checkpoint, provision=args.provision, metrics=collected,
+             dry_run=args.dry_run)
+    if collected:
+        collected.write(args.metrics)
 
 
 
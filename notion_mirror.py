@@ -0,0 +1,142 @@
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import dotenv
+
+from notion_functions import ASSOCIATION_SCHEMA, DISTRICTS_WITH_IDS, iter_many_notion_databases
+
+# 建立索引的欄位，讓常用的進度報表可以直接在本機查詢
+INDEXED_FIELDS = ['聯絡進度', '意願程度']
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect_mirror(db_path, schema=ASSOCIATION_SCHEMA):
+    """
+    Opens the SQLite mirror, creating the tables and indexes when needed.
+
+    Parameters:
+    db_path (str): The path of the SQLite file.
+    schema (NotionSchema): The structure of the mirrored databases.
+
+    Returns:
+    sqlite3.Connection: The open connection.
+    """
+    connection = sqlite3.connect(db_path)
+    columns = ''.join(f', {_quote(prop.name)}' for prop in schema.properties)
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS pages (page_id TEXT PRIMARY KEY, database_id TEXT, "
+        f"district TEXT, last_edited_time TEXT{columns})")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS sync_state (database_id TEXT PRIMARY KEY, district TEXT, last_synced TEXT)")
+    connection.execute("CREATE INDEX IF NOT EXISTS pages_district ON pages (district)")
+    for field in INDEXED_FIELDS:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {_quote('pages_' + field)} ON pages ({_quote(field)})")
+    connection.commit()
+    return connection
+
+
+def mirror_notion_databases(notion_token, districts_with_ids=DISTRICTS_WITH_IDS, db_path='notion_mirror.sqlite',
+                            full=False, schema=ASSOCIATION_SCHEMA, batch_size=500, **kwargs):
+    """
+    Copies the rows of the district databases into a local SQLite mirror.
+
+    After the first run only pages edited since the previous sync of each
+    database are requested, using a last_edited_time filter. Notion does not
+    return archived pages, so rows removed in Notion stay in the mirror until
+    a full refresh.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    districts_with_ids (list): A list of {'name': str, 'id': str} entries.
+    db_path (str): The path of the SQLite file.
+    full (bool): Whether to drop the mirrored rows and read every page again.
+    schema (NotionSchema): The structure of the mirrored databases.
+    batch_size (int): The number of rows written per transaction.
+    **kwargs: Passed through to iter_many_notion_databases, e.g. max_workers.
+
+    Returns:
+    int: The number of rows written.
+    """
+    connection = connect_mirror(db_path, schema)
+    district_names = {district['id']: district['name'] for district in districts_with_ids}
+    # Notion 回傳的 parent.database_id 不一定含連字號，以去掉連字號後的 ID 對照
+    districts_by_id = {database_id.replace('-', ''): name for database_id, name in district_names.items()}
+    # 以開始讀取的時間作為下次的起點，避免漏掉讀取期間被修改的頁面。Notion 的 last_edited_time
+    # 只精確到分鐘（無條件捨去），起點也要捨去到分鐘，否則同一分鐘內稍後修改的頁面會被略過
+    started_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:00.000Z')
+
+    query_filters = {}
+    if full:
+        connection.executemany("DELETE FROM pages WHERE district = ?",
+                               [(name,) for name in district_names.values()])
+    else:
+        for database_id, last_synced in connection.execute("SELECT database_id, last_synced FROM sync_state"):
+            if database_id in district_names:
+                query_filters[database_id] = {
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": last_synced},
+                }
+
+    fields = [prop.name for prop in schema.properties]
+    placeholders = ', '.join('?' * (len(fields) + 4))
+    insert = (f"INSERT OR REPLACE INTO pages (page_id, database_id, district, last_edited_time, "
+              f"{', '.join(map(_quote, fields))}) VALUES ({placeholders})")
+
+    written = 0
+    batch = []
+    pages = iter_many_notion_databases(notion_token, districts_with_ids, query_filters=query_filters, **kwargs)
+    for page in pages:
+        database_id = page['parent']['database_id']
+        district = districts_by_id.get(database_id.replace('-', ''))
+        row = schema.decode(page)
+        batch.append((page['id'], database_id, district, page['last_edited_time'],
+                      *(row[field] for field in fields)))
+        if len(batch) >= batch_size:
+            connection.executemany(insert, batch)
+            connection.commit()
+            written += len(batch)
+            batch = []
+    connection.executemany(insert, batch)
+    written += len(batch)
+
+    connection.executemany(
+        "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+        [(database_id, name, started_at) for database_id, name in district_names.items()])
+    connection.commit()
+    connection.close()
+    return written
+
+
+def progress_report(db_path='notion_mirror.sqlite'):
+    """
+    Counts the mirrored rows per district, contact progress and willingness.
+
+    Returns:
+    list: (district, 聯絡進度, 意願程度, count) tuples.
+    """
+    connection = sqlite3.connect(db_path)
+    rows = connection.execute(
+        'SELECT district, "聯絡進度", "意願程度", COUNT(*) FROM pages '
+        'GROUP BY district, "聯絡進度", "意願程度" ORDER BY district').fetchall()
+    connection.close()
+    return rows
+
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    parser = argparse.ArgumentParser(description="將各區 Notion 資料庫同步到本機 SQLite")
+    parser.add_argument("--db", default="notion_mirror.sqlite", help="SQLite 檔案路徑")
+    parser.add_argument("--full", action="store_true", help="清除本機資料並重新讀取所有頁面")
+    parser.add_argument("--report", action="store_true", help="只從本機資料列出各區聯絡進度")
+    args = parser.parse_args()
+
+    if not args.report:
+        written = mirror_notion_databases(os.getenv("INTERNAL_INTEGRATION_SECRET"), db_path=args.db, full=args.full)
+        print(f"已寫入 {written} 筆資料到 {args.db}")
+    for district, progress, willingness, count in progress_report(args.db):
+        print(f"{district}\t{progress}\t{willingness}\t{count}")
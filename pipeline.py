@@ -0,0 +1,194 @@
+import argparse
+import contextlib
+import os
+import queue
+import threading
+
+import dotenv
+
+from community_crawlers.taichung import taichung_community_info_crawler as crawler
+from community_crawlers.taichung.split_community_associations import extract_district
+from dedup import iter_unique_associations
+import metrics as run_metrics
+from notion_functions import (DISTRICTS_WITH_IDS, batch_add_info_to_notion_database, clean_associations,
+                              get_client, iter_import_items)
+
+
+def iter_buffered(iterable, maxsize=100):
+    """
+    Runs a generator in a background thread and hands its items over through a
+    bounded queue. The producer blocks when the queue is full, so a slow consumer
+    slows the producer down instead of letting items pile up in memory.
+
+    Parameters:
+    iterable (iterable): The producing stage, e.g. a generator of records.
+    maxsize (int): The maximum number of items waiting in the queue.
+
+    Yields:
+    The items of iterable, in order.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def iter_partitioned(records, districts=None, skipped=None):
+    """
+    Adds the district of every scraped record, dropping records without one.
+
+    Parameters:
+    records (iterable): The dicts produced by the crawler.
+    districts (collection): Optional district names to keep, e.g. those with a database.
+    skipped (list): Optional list the dropped records are appended to.
+
+    Yields:
+    dict: The record with an added 'district' key.
+    """
+    for record in records:
+        district = extract_district(record['name']) if record.get('name') else None
+        if district is None or (districts is not None and district not in districts):
+            if skipped is not None:
+                skipped.append(record)
+            continue
+        yield dict(record, district=district)
+
+
+def iter_payload_items(records, district_id_map, chunk_size=20, metrics=None):
+    """
+    Turns partitioned records into import items in small chunks, reusing the
+    vectorized clean_associations/iter_import_items on each chunk.
+
+    Parameters:
+    records (iterable): Records with a 'district' key.
+    district_id_map (dict): A mapping of district name to Notion database ID.
+    chunk_size (int): The number of records cleaned together.
+    metrics (Metrics): Optional metrics, every chunk is timed as the 'transform' stage.
+
+    Yields:
+    dict: One {'database_id': str, 'data': dict} item per record.
+    """
+    # pandas 只有轉換時需要，不拖慢載入
+    import pandas as pd
+
+    def transform(chunk):
+        with metrics.timer('transform') if metrics else contextlib.nullcontext():
+            return list(iter_import_items(clean_associations(pd.DataFrame(chunk)), district_id_map))
+
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield from transform(chunk)
+            chunk = []
+    if chunk:
+        yield from transform(chunk)
+
+
+def stream_import(notion_token, table_urls, districts_with_ids=DISTRICTS_WITH_IDS, crawl_workers=8,
+                  upload_workers=4, queue_size=100, chunk_size=20, checkpoint_path=None, metrics=None):
+    """
+    Crawls the association pages and uploads each record to Notion as soon as
+    it is scraped, without writing or reading any intermediate CSV file.
+
+    crawl -> district partitioning -> dedup -> payload building -> bounded queue -> upload
+
+    Every stage is a generator and the stages are joined by bounded queues, so
+    memory use does not depend on the number of records, and a slow upload
+    holds the crawler back.
+
+    Parameters:
+    notion_token (str or NotionClient): The authorization token for the Notion API.
+    table_urls (list): The list page URLs to crawl.
+    districts_with_ids (list): A list of {'name': str, 'id': str} entries.
+    crawl_workers (int): The number of concurrent crawler requests.
+    upload_workers (int): The number of concurrent Notion requests.
+    queue_size (int): The maximum number of items waiting between crawl and upload.
+    chunk_size (int): The number of records cleaned together.
+    checkpoint_path (str): Optional checkpoint file, see batch_add_info_to_notion_database.
+    metrics (Metrics): Optional metrics. Crawler fetches and parses, transformed
+        chunks and Notion requests are recorded; the 'upload' stage is the wall
+        time of the upload, which overlaps the other stages.
+
+    Returns:
+    tuple: The ImportResult of the upload, the list of records without a known
+    district and the list of duplicate records that were not uploaded.
+    """
+    district_id_map = {district['name']: district['id'] for district in districts_with_ids}
+    skipped = []
+    duplicates = []
+    if metrics:
+        crawler.metrics = metrics
+        client = get_client(notion_token)
+        if metrics not in client.hooks:
+            client.add_hook(metrics)
+    records = crawler.iter_crawl(table_urls, max_workers=crawl_workers)
+    records = iter_unique_associations(iter_partitioned(records, district_id_map, skipped), duplicates=duplicates)
+    items = iter_payload_items(records, district_id_map, chunk_size, metrics)
+    with metrics.timer('upload') if metrics else contextlib.nullcontext():
+        result = batch_add_info_to_notion_database(
+            notion_token, iter_buffered(items, queue_size), concurrency=upload_workers,
+            checkpoint_path=checkpoint_path, group_by_database=False)
+    return result, skipped, duplicates
+
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    parser = argparse.ArgumentParser(description="邊爬取邊將社區發展協會資料匯入 Notion")
+    parser.add_argument("--pages", type=int, help="表格頁面數量，預設由第一個表格頁面判斷")
+    parser.add_argument("--checkpoint", default="notion_import_checkpoint.jsonl",
+                        help="記錄已新增資料的檔案，中斷後重新執行會從這裡接續")
+    parser.add_argument("--cache", default="crawler_cache.sqlite", help="爬蟲回應快取的 SQLite 檔案路徑")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="以多個行程解析詳細頁面，0 表示在爬取的執行緒中解析")
+    run_metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.cache:
+        crawler.response_cache = crawler.ResponseCache(args.cache)
+    collected = run_metrics.Metrics() if args.metrics else None
+    crawler.metrics = collected
+    if args.parse_workers:
+        crawler.start_parse_pool(args.parse_workers)
+    with run_metrics.profiled(args.profile, args.profiler):
+        pages = crawler.discover_page_count() if args.pages is None else args.pages
+        urls = [crawler.list_page_url(i) for i in range(pages)]
+        result, skipped, duplicates = stream_import(os.getenv("INTERNAL_INTEGRATION_SECRET"), urls,
+                                                    checkpoint_path=args.checkpoint, metrics=collected)
+    crawler.stop_parse_pool()
+    if collected:
+        collected.write(args.metrics)
+    print(f"成功新增 {len(result.created) - len(result.skipped)} 筆，略過先前已新增的 {len(result.skipped)} 筆，"
+          f"失敗 {len(result.errors)} 筆，無法判斷行政區 {len(skipped)} 筆，重複 {len(duplicates)} 筆")
@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import dedup  # noqa: E402
+
+DISTRICTS = ['中區', '西屯區', '大安區']
+CHARS = '和山下小福東中新上安'
+
+
+def brute_force(records, threshold):
+    """
+    Compares every record with every kept record of the same district.
+    """
+    index = dedup.AssociationIndex(threshold)
+    kept = []
+    results = []
+    for record in records:
+        key = (dedup.normalize_name(record['name']), dedup.normalize_phone(record['phone']),
+               dedup.normalize_address(record['address']))
+        district = dedup.extract_district(dedup._normalize_text(record['name']))
+        match = next((position for position, (other_district, other) in enumerate(kept)
+                      if other_district == district and index._is_match(*key, other)), None)
+        if match is None:
+            kept.append((district, key))
+        results.append(match)
+    return results
+
+
+def random_records(rng, count):
+    records = []
+    for _ in range(count):
+        if records and rng.random() < 0.5:
+            # 以先前的紀錄為基礎做少量修改，產生接近門檻的名稱
+            base = rng.choice(records)
+            name = list(base['core'])
+            for _ in range(rng.randint(1, 2)):
+                position = rng.randrange(len(name) + 1)
+                operation = rng.choice(('insert', 'delete', 'replace'))
+                if operation == 'insert' or not name:
+                    name.insert(position, rng.choice(CHARS))
+                elif position < len(name):
+                    if operation == 'delete':
+                        del name[position]
+                    else:
+                        name[position] = rng.choice(CHARS)
+            core = ''.join(name) or rng.choice(CHARS)
+            district, address = base['district'], base['address']
+        else:
+            core = ''.join(rng.choices(CHARS, k=rng.randint(1, 14)))
+            district = rng.choice(DISTRICTS)
+            address = f'臺中市{district}某路{rng.randint(1, 3)}號'
+        phone = rng.choice([None, None, '04-22223333', '04-22224444'])
+        records.append({'name': f'臺中市{district}{core}社區發展協會', 'phone': phone,
+                        'address': address, 'core': core, 'district': district})
+    return records
+
+
+def test_near_threshold_duplicate_is_found():
+    index = dedup.AssociationIndex(0.9)
+    address = '臺中市中區某路1號'
+    assert index.add({'name': '臺中市中區和山下和福山東中新上社區發展協會', 'phone': None, 'address': address}) is None
+    assert index.add({'name': '臺中市中區和下小和福山東中新上社區發展協會', 'phone': None, 'address': address}) == 0
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(0)
+    for threshold in (0.6, 0.8, 0.9):
+        records = random_records(rng, 1500)
+        index = dedup.AssociationIndex(threshold)
+        assert [index.add(record) for record in records] == brute_force(records, threshold)
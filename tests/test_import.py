@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import notion_functions  # noqa: E402
+from mock_notion_server import MockNotion, start_server  # noqa: E402
+
+
+@pytest.fixture
+def notion():
+    """
+    Yields (mock, client, database_id) for an empty database on a local mock server.
+    """
+    mock = MockNotion(seed=0)
+    server, base_url = start_server(mock)
+    client = notion_functions.NotionClient('mock-token', base_url=base_url + '/v1', backoff=0.01)
+    database_id = notion_functions.create_notion_database(client, 'parent-page', '臺中市中區')
+    yield mock, client, database_id
+    client.close()
+    server.shutdown()
+
+
+def make_items(database_id, count):
+    items = []
+    for i in range(count):
+        data = {'社區名稱': f'臺中市中區測試{i}社區發展協會', '電話': f'04-2222{i:04}', '對接窗口': f'聯絡人{i}',
+                '職稱': '理事長', 'Email': None, '人口數量': 1000 + i, '地址': f'臺中市中區成功路{i}號'}
+        data.update(notion_functions.DEFAULT_VALUES)
+        items.append({'database_id': database_id, 'data': data})
+    return items
+
+
+def created_names(mock, database_id):
+    return [page['properties']['社區名稱']['title'][0]['plain_text'] for page in mock.pages.values()
+            if page['parent']['database_id'] == database_id and not page['archived']]
+
+
+def interrupted(items, after):
+    """
+    Yields the first items, then fails like a crash in the middle of an import.
+    """
+    for i, item in enumerate(items):
+        if i == after:
+            raise RuntimeError('interrupted')
+        yield item
+
+
+def test_interrupted_import_resumes_without_duplicates(notion, tmp_path):
+    mock, client, database_id = notion
+    items = make_items(database_id, 30)
+    checkpoint_path = str(tmp_path / 'checkpoint.jsonl')
+
+    with pytest.raises(RuntimeError):
+        notion_functions.batch_add_info_to_notion_database(
+            client, interrupted(items, 12), checkpoint_path=checkpoint_path, group_by_database=False, rate=1000)
+    first_run = created_names(mock, database_id)
+    assert 0 < len(first_run) <= 12
+    # 中斷前送出的請求都已寫入 checkpoint
+    with open(checkpoint_path, encoding='utf-8') as file:
+        assert len([json.loads(line) for line in file]) == len(first_run)
+
+    result = notion_functions.batch_add_info_to_notion_database(
+        client, items, checkpoint_path=checkpoint_path, rate=1000)
+    assert result.ok
+    assert len(result.skipped) == len(first_run)
+    assert len(result.created) == len(items)
+    names = created_names(mock, database_id)
+    assert sorted(names) == sorted(item['data']['社區名稱'] for item in items)
+
+    # 再執行一次時全部略過，不送出任何請求
+    requests_before = mock.stats['requests']
+    result = notion_functions.batch_add_info_to_notion_database(
+        client, items, checkpoint_path=checkpoint_path, rate=1000)
+    assert len(result.skipped) == len(items)
+    assert mock.stats['requests'] == requests_before
+
+
+def test_failed_rows_are_retried_on_resume(notion, tmp_path):
+    mock, client, database_id = notion
+    items = make_items(database_id, 30)
+    checkpoint_path = str(tmp_path / 'checkpoint.jsonl')
+
+    mock.rate_5xx = 0.3
+    result = notion_functions.batch_add_info_to_notion_database(
+        client, items, checkpoint_path=checkpoint_path, rate=1000, max_retries=0)
+    assert result.errors
+    assert len(created_names(mock, database_id)) == len(items) - len(result.errors)
+
+    mock.rate_5xx = 0.0
+    result = notion_functions.batch_add_info_to_notion_database(
+        client, items, checkpoint_path=checkpoint_path, rate=1000)
+    assert result.ok
+    assert sorted(created_names(mock, database_id)) == sorted(item['data']['社區名稱'] for item in items)
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import notion_functions  # noqa: E402
+from mock_notion_server import MockNotion, start_server  # noqa: E402
+
+# 在 Notion 中手動維護、不由 CSV 匯入的欄位
+MANUAL_FIELDS = {'聯絡進度': '已聯絡', '意願程度': '願意合作', '聯絡方式': '電訪'}
+
+
+@pytest.fixture
+def notion():
+    """
+    Yields (mock, client, database_id) for an empty database on a local mock server.
+    """
+    mock = MockNotion(seed=0)
+    server, base_url = start_server(mock)
+    client = notion_functions.NotionClient('mock-token', base_url=base_url + '/v1', backoff=0.01)
+    database_id = notion_functions.create_notion_database(client, 'parent-page', '臺中市中區')
+    yield mock, client, database_id
+    client.close()
+    server.shutdown()
+
+
+def row(name, phone='04-22220000'):
+    data = {'社區名稱': f'臺中市中區{name}社區發展協會', '電話': phone, '對接窗口': '王小明', '職稱': '理事長',
+            'Email': None, '人口數量': 1000, '地址': f'臺中市中區{name}路1號'}
+    data.update(notion_functions.DEFAULT_VALUES)
+    return data
+
+
+def add_page(client, database_id, data):
+    response = client.request('POST', '/pages', notion_functions.build_page_data(database_id, data))
+    return response.json()['id']
+
+
+def live_pages(mock, database_id):
+    pages = [page for page in mock.pages.values()
+             if page['parent']['database_id'] == database_id and not page['archived']]
+    return {page['id']: notion_functions.ASSOCIATION_SCHEMA.decode(page) for page in pages}
+
+
+def test_sync_creates_updates_and_archives_expected_pages(notion):
+    mock, client, database_id = notion
+    ids = {name: add_page(client, database_id, row(name)) for name in ('甲', '乙', '丙', '丁')}
+    duplicate_id = add_page(client, database_id, row('丁'))
+    # 聯絡進度等欄位由使用者在 Notion 中填寫
+    client.request('PATCH', f"/pages/{ids['甲']}", {
+        'properties': notion_functions.ASSOCIATION_SCHEMA.encode(MANUAL_FIELDS, list(MANUAL_FIELDS))})
+    edited_before = {page_id: page['last_edited_time'] for page_id, page in mock.pages.items()}
+
+    # 甲換了電話，乙、丁不變，丙已不在資料中，戊是新的
+    rows = [row('甲', phone='04-23456789'), row('乙'), row('丁'), row('戊')]
+    items = [{'database_id': database_id, 'data': data} for data in rows]
+    summary = notion_functions.sync_notion_databases(client, items, rate=1000)
+
+    assert (summary['create'], summary['update'], summary['archive']) == (1, 1, 2)
+    assert all(result['ok'] for result in summary['results'])
+    assert mock.pages[ids['丙']]['archived']
+    assert mock.pages[duplicate_id]['archived']
+    for name in ('乙', '丁'):
+        assert mock.pages[ids[name]]['last_edited_time'] == edited_before[ids[name]]
+
+    pages = live_pages(mock, database_id)
+    assert sorted(data['社區名稱'] for data in pages.values()) == sorted(data['社區名稱'] for data in rows)
+    updated = pages[ids['甲']]
+    assert updated['電話'] == '04-23456789'
+    assert {field: updated[field] for field in MANUAL_FIELDS} == MANUAL_FIELDS
+    created = next(data for page_id, data in pages.items() if page_id not in ids.values())
+    assert created == row('戊')
+
+    # 再同步一次時沒有任何變動
+    summary = notion_functions.sync_notion_databases(client, items, rate=1000)
+    assert (summary['create'], summary['update'], summary['archive']) == (0, 0, 0)
+
+
+def test_sync_keeps_missing_pages_without_archive_missing(notion):
+    mock, client, database_id = notion
+    kept_id = add_page(client, database_id, row('甲'))
+    items = [{'database_id': database_id, 'data': row('乙')}]
+    summary = notion_functions.sync_notion_databases(client, items, archive_missing=False, rate=1000)
+    assert (summary['create'], summary['update'], summary['archive']) == (1, 0, 0)
+    assert not mock.pages[kept_id]['archived']